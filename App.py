@@ -1,13 +1,13 @@
 import os
-from Game import Game
+from Engines import ENGINES, make_game
 from Sudoku import Sudoku
 
 sudoku_folder = os.path.join(os.path.dirname(__file__), "Sudokus")
 
 class App:
     @staticmethod
-    def solve_sudoku(sudoku_file, h_type, solver_type):
-        game = Game(Sudoku(sudoku_file), h_type, False)
+    def solve_sudoku(sudoku_file, h_type, solver_type, engine=None):
+        game = make_game(engine, Sudoku(sudoku_file), h_type, False)
         game.show_sudoku()
         if solver_type == 1:
             if (game.full_solver() and game.valid_solution()):
@@ -38,8 +38,10 @@ class App:
                 print("-1 for no heuristic, \n 0 for MRV, \n 1 for finalized fields first, \n 2 for both MRV and finalized fields")
                 print("After that, please indicate if you want to only use AC-3, or utilize the full solver, which does backtracking after AC-3 if necessary")
                 print("0 for only AC-3, 1 for full solving")
+                print("Finally, pick the engine of the full solver: " + ", ".join(ENGINES) + " (default fc, dlx from 25x25)")
                 h_type = int(input())
                 solver_type = int(input())
+                engine = input().strip() or None
                 
                 if h_type < -1 and h_type > 2:
                     print("invalid heuristic choice, defaulting to no heuristic, you naughty boy >:(")
@@ -47,7 +49,10 @@ class App:
                 if not (solver_type == 0 or solver_type == 1):
                     print("invalid choice for solver selection, defaulting to the full solver.")
                     solver_type = 1
-                App.solve_sudoku(os.path.join(sudoku_folder, file), h_type, solver_type)
+                if engine is not None and engine not in ENGINES:
+                    print("invalid engine, defaulting to the engine of the board size.")
+                    engine = None
+                App.solve_sudoku(os.path.join(sudoku_folder, file), h_type, solver_type, engine)
             else:
                 print("Invalid choice")
 
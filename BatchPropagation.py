@@ -0,0 +1,143 @@
+"""
+Vectorised singles propagation over many boards at once, with NumPy.
+
+N boards are held as an (N, 81) uint16 array of candidate masks (same bit layout as Field.domain, see Domain.py),
+and every round of naked singles elimination and hidden singles runs as whole-array operations over the peer and unit
+tables of the topology, for all boards that are still undecided. Boards that end up solved or contradicted are dropped
+from the next round. Only the boards left undecided are turned into Sudoku objects and handed to the scalar search.
+
+NumPy is an optional dependency, only this module needs it.
+"""
+from Domain import POPCOUNT, FULL_DOMAIN
+from Game import Game
+from Sudoku import Sudoku
+from Topology import TOPOLOGY
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# outcome of the propagation, per board
+UNDECIDED = 0
+SOLVED = 1
+CONTRADICTION = 2
+
+default_chunksize = 4096  # boards propagated together, bounds the size of the (boards, 81, 20) temporaries
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("BatchPropagation needs NumPy, install it with 'pip install numpy'")
+
+
+def puzzles_to_masks(puzzles):
+    """
+    Converts puzzle strings into candidate masks
+    :param puzzles: list of 81 character puzzle strings, '0' or '.' for unset fields
+    :return: (N, 81) uint16 array, a single bit for set fields and the full domain for unset ones
+    """
+    _require_numpy()
+    raw = np.frombuffer("".join(puzzles).encode("ascii"), dtype=np.uint8).reshape(len(puzzles), 81)
+    digits = np.where(raw == ord("."), 0, raw.astype(np.int32) - ord("0"))
+    if ((digits < 0) | (digits > 9)).any():
+        raise ValueError("Puzzles may only contain the digits 0-9 and '.'")
+    return np.where(digits > 0, 1 << np.maximum(digits - 1, 0), FULL_DOMAIN).astype(np.uint16)
+
+
+def propagate_masks(masks, hidden_singles=True):
+    """
+    Runs naked (and optionally hidden) singles on every board until each one is solved, contradicted or stuck.
+    :param masks: (N, 81) uint16 candidate masks, updated in place
+    :param hidden_singles: also place values that fit in only one field of a unit
+    :return: (N,) uint8 array with UNDECIDED, SOLVED or CONTRADICTION per board
+    """
+    _require_numpy()
+    peers = np.array(TOPOLOGY.peers, dtype=np.intp)
+    # rows, columns and blocks each partition the board, so a scatter over one kind never writes a cell twice
+    unit_kinds = [np.array(kind, dtype=np.intp) for kind in (TOPOLOGY.rows, TOPOLOGY.cols, TOPOLOGY.boxes)]
+    popcount = np.array(POPCOUNT, dtype=np.uint8)
+
+    status = np.full(len(masks), UNDECIDED, dtype=np.uint8)
+    active = np.arange(len(masks))
+    while len(active):
+        board = masks[active]
+        single = popcount[board] == 1
+
+        # naked singles: remove the value of every decided field from its peers
+        fixed = np.where(single, board, 0).astype(np.uint16)
+        taken = np.bitwise_or.reduce(fixed[:, peers], axis=2)
+        contradicted = (single & ((board & taken) != 0)).any(axis=1)
+        new = np.where(single, board, board & ~taken).astype(np.uint16)
+
+        if hidden_singles:
+            forced = np.zeros_like(new)
+            for digit in range(9):
+                has = ((new >> digit) & 1).astype(bool)
+                for units in unit_kinds:
+                    in_unit = has[:, units]
+                    counts = in_unit.sum(axis=2)
+                    contradicted |= (counts == 0).any(axis=1)
+                    hit = np.zeros_like(has)
+                    hit[:, units] = in_unit & (counts == 1)[:, :, None]
+                    forced |= np.where(hit, np.uint16(1 << digit), np.uint16(0))
+            # a field forced to two different values is a contradiction, popcount > 1 keeps it undecided below
+            contradicted |= (popcount[forced] > 1).any(axis=1)
+            new = np.where(forced != 0, forced, new)
+
+        contradicted |= (new == 0).any(axis=1)
+        solved = ~contradicted & (popcount[new] == 1).all(axis=1)
+        if solved.any():
+            # fields decided in this round were never checked against each other: two peers may have been given
+            # the same value, so a full board only counts as solved without any clash
+            full = new[solved]
+            clash = (full & np.bitwise_or.reduce(full[:, peers], axis=2) != 0).any(axis=1)
+            contradicted[solved] |= clash
+            solved[solved] = ~clash
+        changed = (new != board).any(axis=1)
+        masks[active] = new
+
+        status[active[contradicted]] = CONTRADICTION
+        status[active[solved]] = SOLVED
+        active = active[changed & ~contradicted & ~solved]
+    return status
+
+
+def masks_to_string(mask_row):
+    """The decided fields of one board as an 81 character string, '0' for undecided fields"""
+    return "".join(str(int(m).bit_length()) if POPCOUNT[int(m)] == 1 else "0" for m in mask_row)
+
+
+def sudoku_from_masks(mask_row):
+    """Builds a Sudoku whose fields have the given candidate masks, fields with a single candidate are set"""
+    sudoku = Sudoku(puzzle=masks_to_string(mask_row))
+    for field, mask in zip(sudoku.cells, mask_row):
+        field.set_domain_mask(int(mask))
+    return sudoku
+
+
+def solve_masks(puzzles, hidden_singles=True, chunksize=default_chunksize):
+    """
+    Solves many puzzles: vectorised propagation first, then the scalar backtracker for the boards it left undecided.
+    :param puzzles: iterable of 81 character puzzle strings
+    :return: generator of (solution string or None if unsolvable, True if the search was needed), in input order
+    """
+    _require_numpy()
+    puzzles = iter(puzzles)
+    while True:
+        chunk = [puzzle for _, puzzle in zip(range(chunksize), puzzles)]
+        if not chunk:
+            return
+        masks = puzzles_to_masks(chunk)
+        status = propagate_masks(masks, hidden_singles)
+        for i in range(len(chunk)):
+            if status[i] == SOLVED:
+                yield masks_to_string(masks[i]), False
+            elif status[i] == CONTRADICTION:
+                yield None, False
+            else:
+                game = Game(sudoku_from_masks(masks[i]), -1, True)
+                if game.backtracker() and game.valid_solution():
+                    yield game.sudoku.to_string(), True
+                else:
+                    yield None, True
@@ -0,0 +1,176 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+from Corpus import Corpus, is_corpus
+from Engines import make_game
+from Sudoku import Sudoku
+
+default_chunksize = 64  # puzzles sent to a worker per task, amortises the pickling/IPC cost of a single puzzle
+
+
+class SolveResult:
+    """
+    Outcome of solving one puzzle of a batch.
+    index: position of the puzzle in the input iterable
+    puzzle: the puzzle as an 81 character string
+    solution: the final board as an 81 character string, '0' for fields that could not be set
+    solved: True if the full solver succeeded and the solution is valid
+    arc_revisions: number of arc revisions done by the solver
+    wall_time: seconds spent parsing and solving the puzzle
+    counters: the counters of the solver, see Game.counters, to find the puzzles behind latency spikes
+    """
+
+    def __init__(self, index, puzzle, solution, solved, arc_revisions, wall_time, counters=None):
+        self.index = index
+        self.puzzle = puzzle
+        self.solution = solution
+        self.solved = solved
+        self.arc_revisions = arc_revisions
+        self.wall_time = wall_time
+        self.counters = counters if counters is not None else {}
+
+    def __repr__(self):
+        return (f"SolveResult(index={self.index}, solved={self.solved}, "
+                f"arc_revisions={self.arc_revisions}, wall_time={self.wall_time:.6f})")
+
+
+def solve_puzzle(puzzle, h_type=-1, index=0) -> SolveResult:
+    """
+    Solves a single puzzle with the full solver, in the current process, with the default engine of its size
+    (see Engines.default_engine).
+    :param puzzle: puzzle string, 81 characters for a 9x9 board
+    :param h_type: heuristic type used by AC-3, see Game
+    :param index: index to report in the result
+    """
+    start = time.perf_counter()
+    game = make_game(None, Sudoku(puzzle=puzzle), h_type, True)
+    solved = game.full_solver() and game.valid_solution()
+    wall_time = time.perf_counter() - start
+    return SolveResult(index, puzzle, game.sudoku.to_string(), solved, game.arc_revisions, wall_time, game.counters())
+
+
+def _solve_chunk(first_index, puzzles, h_type):
+    """Worker side of solve_batch, solves a chunk of consecutive puzzles"""
+    return [solve_puzzle(puzzle, h_type, first_index + i) for i, puzzle in enumerate(puzzles)]
+
+
+# corpora opened by this worker process, by path, see _solve_corpus_chunk
+_corpora = {}
+
+
+def _solve_corpus_chunk(path, start, stop, h_type):
+    """Worker side of solve_corpus, solves the records start to stop of a corpus, mapped once per worker"""
+    corpus = _corpora.get(path)
+    if corpus is None:
+        corpus = _corpora[path] = Corpus(path)
+    return [solve_puzzle(corpus[index], h_type, index) for index in range(start, stop)]
+
+
+def _chunks(puzzles, chunksize):
+    """Lazily splits the puzzles into (index of first puzzle, list of puzzle strings) chunks"""
+    iterator = iter(puzzles)
+    index = 0
+    while True:
+        chunk = [p.to_string() if isinstance(p, Sudoku) else p for p in islice(iterator, chunksize)]
+        if not chunk:
+            return
+        yield index, chunk
+        index += len(chunk)
+
+
+def solve_batch(puzzles, h_type=-1, max_workers=None, chunksize=default_chunksize, ordered=True):
+    """
+    Solves many puzzles over a pool of worker processes.
+    The input is consumed lazily and only a bounded number of chunks is in flight at any time,
+    so arbitrarily large (streamed) inputs are processed in constant memory.
+
+    :param puzzles: iterable of 81 character puzzle strings or Sudoku objects
+    :param h_type: heuristic type used by AC-3, see Game
+    :param max_workers: number of worker processes, defaults to the number of CPUs
+    :param chunksize: number of puzzles per task sent to a worker
+    :param ordered: if True, results are yielded in input order, otherwise as soon as their chunk completes
+    :return: generator of SolveResult
+    """
+    tasks = ((_solve_chunk, index, chunk, h_type) for index, chunk in _chunks(puzzles, chunksize))
+    return run_tasks(tasks, max_workers, ordered)
+
+
+def solve_corpus(path, h_type=-1, max_workers=None, chunksize=default_chunksize, ordered=True):
+    """
+    Like solve_batch, for the puzzles of a binary corpus (see Corpus.py). The tasks only carry record ranges,
+    no puzzle is sent to the workers: every worker maps the corpus file once and reads its records from there.
+    :param path: corpus file
+    :return: generator of SolveResult, their index being the record number
+    """
+    with Corpus(path) as corpus:
+        count = len(corpus)
+    tasks = ((_solve_corpus_chunk, path, start, min(start + chunksize, count), h_type)
+             for start in range(0, count, chunksize))
+    return run_tasks(tasks, max_workers, ordered)
+
+
+def run_tasks(tasks, max_workers, ordered):
+    """
+    Runs tasks over a pool of worker processes, with a bounded number of them in flight, the scheduler of every batch
+    API (solve_batch, solve_corpus, Generator.generate_batch)
+    :param tasks: iterable of (function, *args), each function returning a list of results
+    :return: generator of the results of every task, in task order or as they complete
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    max_in_flight = 2 * max_workers  # keep every worker busy while its next chunk is already queued
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        tasks = iter(tasks)
+        in_flight = deque()
+
+        def submit_next():
+            task = next(tasks, None)
+            if task is None:
+                return False
+            in_flight.append(executor.submit(*task))
+            return True
+
+        while len(in_flight) < max_in_flight and submit_next():
+            pass
+
+        while in_flight:
+            if ordered:
+                done = [in_flight.popleft()]
+            else:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                done = [future for future in in_flight if future in finished]
+                for future in done:
+                    in_flight.remove(future)
+
+            for future in done:
+                submit_next()
+                yield from future.result()
+
+
+if __name__ == "__main__":
+    import argparse
+    import csv
+    import sys
+    from PuzzleReader import read_puzzles
+
+    parser = argparse.ArgumentParser(description="Solve a file of puzzles, one 81 character puzzle per line, "
+                                                 "or a binary corpus, see Corpus.py.")
+    parser.add_argument("source", nargs="?", default="-", help="puzzle file or corpus, '-' for stdin")
+    parser.add_argument("--heuristic", type=int, default=-1, help="AC-3 heuristic, -1 to 2")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=default_chunksize)
+    parser.add_argument("--unordered", action="store_true", help="write results as they complete")
+    parser.add_argument("--mmap", action="store_true", help="memory-map the puzzle file")
+    args = parser.parse_args()
+
+    writer = csv.writer(sys.stdout)
+    writer.writerow(["Index", "Solved", "Revisions", "Wall_Time", "Solution"])
+    if args.source != "-" and is_corpus(args.source):
+        results = solve_corpus(args.source, args.heuristic, args.workers, args.chunksize, not args.unordered)
+    else:
+        puzzles = read_puzzles(args.source, args.mmap)
+        results = solve_batch(puzzles, args.heuristic, args.workers, args.chunksize, not args.unordered)
+    for result in results:
+        writer.writerow([result.index, int(result.solved), result.arc_revisions, f"{result.wall_time:.6f}", result.solution])
@@ -0,0 +1,253 @@
+"""
+Benchmark harness for the full solvers, over a corpus of puzzles and a matrix of configurations.
+
+A configuration is an engine (see Engines.py), an AC-3 heuristic and a propagation level (see Game.propagate).
+For every configuration, every puzzle is solved warmup times untimed, then repetitions times timed with perf_counter_ns,
+with the garbage collector off like timeit does. The counters (search nodes, arc revisions, arc pops, rule firings)
+are deterministic, so they are taken once per puzzle, and so is the peak memory: tracemalloc slows every allocation down,
+so it gets a run of its own that is never timed.
+
+All configurations end up in one table, written as CSV and JSON, with p50/p95/p99 of the wall time over every timed run
+and of the counters over the puzzles. The JSON can be kept as a baseline, and a later run compared against it:
+any metric that got worse by more than the tolerance is reported as a regression.
+"""
+import csv
+import gc
+import json
+import os
+import time
+import tracemalloc
+from Engines import ENGINES, make_game
+from Sudoku import Sudoku
+
+benchmark_folder = os.path.join(os.path.dirname(__file__), "Benchmarks")
+sudoku_folder = os.path.join(os.path.dirname(__file__), "Sudokus")
+
+PERCENTILES = (50, 95, 99)
+# metrics summarised by percentiles; all of them are better when lower, which is what compare relies on
+METRICS = ("wall_time_us", "nodes", "revisions", "arc_pops", "rule_firings", "peak_kib")
+default_tolerance = 0.10  # relative slowdown tolerated before compare reports a regression
+
+
+class Configuration:
+    """One point of the benchmark matrix: engine, AC-3 heuristic type and propagation level"""
+
+    def __init__(self, engine, h_type=-1, level=0):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine {engine!r}, pick one of {', '.join(ENGINES)}")
+        self.engine = engine
+        self.h_type = h_type
+        self.level = level
+
+    @property
+    def key(self):
+        """Identifies the configuration in the results and in baselines"""
+        return f"{self.engine}/h{self.h_type}/p{self.level}"
+
+    def make_game(self, sudoku):
+        return make_game(self.engine, sudoku, self.h_type, True)
+
+    def solve(self, game):
+        return game.full_solver(self.level) and game.valid_solution()
+
+
+def matrix(engines, heuristics=(-1,), levels=(0,)):
+    """Every combination of the given engines, heuristic types and propagation levels"""
+    return [Configuration(engine, h_type, level) for engine in engines for h_type in heuristics for level in levels]
+
+
+def percentile(samples, p):
+    """
+    p-th percentile of the samples, interpolating linearly between the closest ranks
+    :param samples: non empty sorted list of numbers
+    """
+    rank = (len(samples) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(samples) - 1)
+    return samples[low] + (samples[high] - samples[low]) * (rank - low)
+
+
+def time_solve(configuration, sudoku, unsolved):
+    """
+    Solves the puzzle once with the garbage collector off, the board is restored before the clock starts
+    :param sudoku: the parsed puzzle, solved in place
+    :param unsolved: snapshot of the unsolved board, see Sudoku.snapshot
+    :return: (solved, game, wall time in nanoseconds)
+    """
+    sudoku.restore(unsolved)
+    game = configuration.make_game(sudoku)
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter_ns()
+        solved = configuration.solve(game)
+        wall_time = time.perf_counter_ns() - start
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return solved, game, wall_time
+
+
+def peak_memory(configuration, sudoku, unsolved):
+    """Peak memory in bytes allocated while building the solver and solving the puzzle, measured with tracemalloc"""
+    sudoku.restore(unsolved)
+    tracemalloc.start()
+    try:
+        configuration.solve(configuration.make_game(sudoku))
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_configuration(configuration, puzzles, warmup=1, repetitions=5, memory=True):
+    """
+    Benchmarks one configuration over all puzzles
+    :param puzzles: list of 81 character puzzle strings
+    :param warmup: untimed runs per puzzle before the timed ones
+    :param repetitions: timed runs per puzzle, at least one: the counters and the outcome come from the timed runs
+    :param memory: also measure the peak memory, in an extra untimed run per puzzle
+    :return: dict with the configuration, the number of puzzles solved and p50/p95/p99 of every metric
+    @raise ValueError: if repetitions is less than 1
+    """
+    if repetitions < 1:
+        raise ValueError(f"At least one timed repetition is needed, got {repetitions}")
+    samples = {metric: [] for metric in METRICS}
+    solved_count = 0
+    for puzzle in puzzles:
+        # parsed once, every run restores the unsolved board instead
+        sudoku = Sudoku(puzzle=puzzle)
+        unsolved = sudoku.snapshot()
+        for _ in range(warmup):
+            time_solve(configuration, sudoku, unsolved)
+        for _ in range(repetitions):
+            solved, game, wall_time = time_solve(configuration, sudoku, unsolved)
+            samples["wall_time_us"].append(wall_time / 1000)
+        # the counters of the last run, they are the same for every run
+        solved_count += solved
+        samples["nodes"].append(game.nodes)
+        samples["revisions"].append(game.arc_revisions)
+        samples["arc_pops"].append(game.queue_pops)
+        samples["rule_firings"].append(sum(game.rule_firings.values()))
+        if memory:
+            samples["peak_kib"].append(peak_memory(configuration, sudoku, unsolved) / 1024)
+
+    row = {"key": configuration.key, "engine": configuration.engine, "heuristic": configuration.h_type,
+           "level": configuration.level, "puzzles": len(puzzles), "solved": solved_count, "repetitions": repetitions}
+    for metric in METRICS:
+        values = sorted(samples[metric])
+        for p in PERCENTILES:
+            row[f"{metric}_p{p}"] = round(percentile(values, p), 3) if values else None
+    return row
+
+
+def run_suite(puzzles, configurations, warmup=1, repetitions=5, memory=True, progress=None):
+    """
+    Benchmarks every configuration over all puzzles, see run_configuration
+    :param progress: called with every result row as soon as it is ready, e.g. print
+    :return: list of result rows, one per configuration
+    """
+    puzzles = [p.to_string() if isinstance(p, Sudoku) else p for p in puzzles]
+    results = []
+    for configuration in configurations:
+        row = run_configuration(configuration, puzzles, warmup, repetitions, memory)
+        results.append(row)
+        if progress is not None:
+            progress(row)
+    return results
+
+
+def write_results(results, path):
+    """Writes the result rows to path.csv and path.json"""
+    with open(path + ".csv", mode="w", newline="") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=list(results[0]))
+        writer.writeheader()
+        writer.writerows(results)
+    with open(path + ".json", mode="w") as jsonfile:
+        json.dump(results, jsonfile, indent=1)
+
+
+def load_results(path):
+    """Reads result rows written by write_results, path being the .json file"""
+    with open(path) as jsonfile:
+        return json.load(jsonfile)
+
+
+def compare(results, baseline, tolerance=default_tolerance):
+    """
+    Compares result rows against baseline rows of the same configurations.
+    Configurations or metrics missing on either side are skipped.
+    :param tolerance: relative increase of a metric tolerated, e.g. 0.1 for 10%
+    :return: list of (configuration key, metric, baseline value, new value) for every metric that got worse
+        by more than the tolerance, and for the solved count if fewer puzzles were solved
+    """
+    by_key = {row["key"]: row for row in baseline}
+    regressions = []
+    for row in results:
+        base = by_key.get(row["key"])
+        if base is None:
+            continue
+        if row["solved"] < base["solved"]:
+            regressions.append((row["key"], "solved", base["solved"], row["solved"]))
+        for metric in METRICS:
+            for p in PERCENTILES:
+                name = f"{metric}_p{p}"
+                old, new = base.get(name), row.get(name)
+                if old is None or new is None:
+                    continue
+                if new > old * (1 + tolerance) and new - old > 1e-9:
+                    regressions.append((row["key"], name, old, new))
+    return regressions
+
+
+def bundled_puzzles():
+    """The puzzles of the Sudokus folder, in numeric order"""
+    files = sorted(os.listdir(sudoku_folder), key=lambda f: int(f.replace("Sudoku", "").replace(".txt", "")))
+    return [Sudoku(os.path.join(sudoku_folder, f)).to_string() for f in files]
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    from Corpus import Corpus, is_corpus
+    from PuzzleReader import read_puzzles
+
+    parser = argparse.ArgumentParser(description="Benchmark the full solvers over a corpus and a configuration matrix.")
+    parser.add_argument("corpus", nargs="?", default=None,
+                        help="puzzle file, one 81 character puzzle per line, or a binary corpus (see Corpus.py), "
+                             "defaults to the Sudokus folder")
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument("--heuristics", nargs="+", type=int, default=[-1], help="AC-3 heuristics, -1 to 2")
+    parser.add_argument("--levels", nargs="+", type=int, default=[0], help="propagation levels, 0 to 3")
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repetitions", type=int, default=5, help="timed runs per puzzle, at least 1")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc runs")
+    parser.add_argument("--out", default=os.path.join(benchmark_folder, "suite"),
+                        help="output path without extension, .csv and .json are written")
+    parser.add_argument("--baseline", help="results .json of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=default_tolerance)
+    args = parser.parse_args()
+    if args.repetitions < 1:
+        parser.error("--repetitions must be at least 1")
+
+    if args.corpus is None:
+        corpus = bundled_puzzles()
+    elif is_corpus(args.corpus):
+        with Corpus(args.corpus) as packed:
+            corpus = list(packed)
+    else:
+        corpus = list(read_puzzles(args.corpus))
+    configurations = matrix(args.engines, args.heuristics, args.levels)
+    results = run_suite(corpus, configurations, args.warmup, args.repetitions, not args.no_memory,
+                        lambda row: print(f"{row['key']}: solved {row['solved']}/{row['puzzles']}, "
+                                          f"p50 {row['wall_time_us_p50']:.1f}us, p99 {row['wall_time_us_p99']:.1f}us"))
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    write_results(results, args.out)
+    print(f"Benchmark results written to {args.out}.csv and {args.out}.json")
+
+    if args.baseline:
+        regressions = compare(results, load_results(args.baseline), args.tolerance)
+        for key, name, old, new in regressions:
+            print(f"REGRESSION {key} {name}: {old} -> {new}")
+        if regressions:
+            sys.exit(1)
+        print("No regression against the baseline")
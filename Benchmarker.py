@@ -1,6 +1,9 @@
 import os
 import csv
-from Game import Game
+import time
+import tracemalloc
+from Game import Game, INIT_ALL_ARCS, INIT_GIVENS
+from Engines import ENGINES, make_game
 from Sudoku import Sudoku
 
 sudoku_folder = os.path.join(os.path.dirname(__file__), "Sudokus")
@@ -10,13 +13,19 @@ nr_of_heuristics = 3  # number of heuristics, not including no heuristic (-1)
 # Create the benchmark folder if it does not exist
 os.makedirs(benchmark_folder, exist_ok=True)
 
-def solve_sudoku(sudoku_file, h_type) -> bool:
-    """Solves a Sudoku using a specified heuristic."""
-    game = Game(Sudoku(sudoku_file), h_type, True)
-    if game.AC_3() and game.valid_solution():
-        return True, game.arc_revisions
+def solve_sudoku(sudoku, h_type, dedup_queue=False):
+    """
+    Solves a Sudoku using a specified heuristic, returns whether it was solved, the solver with its counters and the time AC-3 took.
+    The board is solved in place, restore a snapshot taken beforehand to run it again.
+    """
+    game = Game(sudoku, h_type, True, dedup_queue)
+    start = time.perf_counter()
+    solved = game.AC_3()
+    wall_time = time.perf_counter() - start
+    if solved and game.valid_solution():
+        return True, game, wall_time
     else:
-        return False, game.arc_revisions
+        return False, game, wall_time
 
 def benchmark() -> None:
     """Benchmark different heuristics on multiple Sudoku puzzles and save results to CSV files in a separate folder."""
@@ -26,7 +35,9 @@ def benchmark() -> None:
     # Loop through each Sudoku file
     sudoku_number = 1
     for filename in files:
-        sudoku_path = os.path.join(sudoku_folder, filename)
+        # read once, every run starts from a snapshot of the unsolved board
+        sudoku = Sudoku(os.path.join(sudoku_folder, filename))
+        unsolved = sudoku.snapshot()
         
         # Create a CSV file for each Sudoku in the Benchmarks folder
         csv_filename = f"benchmark_{filename.replace('.txt', '')}.csv"
@@ -36,17 +47,112 @@ def benchmark() -> None:
         with open(csv_filepath, mode='w', newline='') as csvfile:
             writer = csv.writer(csvfile)
             # Write header row
-            writer.writerow(["Sudoku_Number", "Solved", "Heuristic_ID", "Revisions"])
+            writer.writerow(["Sudoku_Number", "Solved", "Heuristic_ID", "Dedup", "Revisions", "Queue_Pushes", "Queue_Pops", "Wall_Time_ms"])
             
-            # Loop from -1 to nr_of_heuristics to test each heuristic
+            # Loop from -1 to nr_of_heuristics to test each heuristic, with and without arc queue deduplication
             for heuristic in range(-1, nr_of_heuristics):
-                solved, revisions = solve_sudoku(sudoku_path, heuristic)
+                for dedup_queue in (False, True):
+                    sudoku.restore(unsolved)
+                    solved, game, wall_time = solve_sudoku(sudoku, heuristic, dedup_queue)
                 
-                # Write benchmark results to the CSV
-                writer.writerow([sudoku_number, int(solved), heuristic, revisions])
+                    # Write benchmark results to the CSV
+                    writer.writerow([sudoku_number, int(solved), heuristic, int(dedup_queue),
+                                     game.arc_revisions, game.queue_pushes, game.queue_pops, f"{wall_time * 1000:.3f}"])
         
         print(f"Benchmark results written to {csv_filepath}")
         sudoku_number += 1
 
+def benchmark_engines() -> None:
+    """Benchmark the full solver of every engine on every Sudoku puzzle, results go to a single CSV file in the Benchmarks folder."""
+    files = sorted(os.listdir(sudoku_folder), key=lambda f: int(f.replace("Sudoku", "").replace(".txt", "")))
+    csv_filepath = os.path.join(benchmark_folder, "benchmark_engines.csv")
+
+    with open(csv_filepath, mode='w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(["Sudoku_Number", "Engine", "Solved", "Nodes", "Wall_Time_ms"])
+        for sudoku_number, filename in enumerate(files, start=1):
+            sudoku = Sudoku(os.path.join(sudoku_folder, filename))
+            unsolved = sudoku.snapshot()
+            for engine in ENGINES:
+                sudoku.restore(unsolved)
+                game = make_game(engine, sudoku, -1, True)
+                start = time.perf_counter()
+                solved = game.full_solver() and game.valid_solution()
+                wall_time = time.perf_counter() - start
+                writer.writerow([sudoku_number, engine, int(solved), game.nodes, f"{wall_time * 1000:.3f}"])
+
+    print(f"Benchmark results written to {csv_filepath}")
+
+def benchmark_init(repetitions=20) -> None:
+    """
+    Benchmark the start of AC-3 with every arc in the worklist against the givens driven start (see Game.init_from_givens),
+    setup and the rest of AC-3 timed apart, best of the repetitions. Results go to a single CSV file in the Benchmarks folder.
+    """
+    files = sorted(os.listdir(sudoku_folder), key=lambda f: int(f.replace("Sudoku", "").replace(".txt", "")))
+    csv_filepath = os.path.join(benchmark_folder, "benchmark_init.csv")
+
+    with open(csv_filepath, mode='w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(["Sudoku_Number", "Init_Mode", "Solved", "Revisions", "Queue_Pushes", "Queue_Pops",
+                         "Setup_Time_us", "AC3_Time_us"])
+        for sudoku_number, filename in enumerate(files, start=1):
+            sudoku = Sudoku(os.path.join(sudoku_folder, filename))
+            unsolved = sudoku.snapshot()
+            for init_mode in (INIT_ALL_ARCS, INIT_GIVENS):
+                setup_time = ac3_time = float("inf")
+                for _ in range(repetitions):
+                    sudoku.restore(unsolved)
+                    game = Game(sudoku, -1, True, init_mode=init_mode)
+                    start = time.perf_counter()
+                    if init_mode == INIT_GIVENS:
+                        consistent = game.init_from_givens()
+                    else:
+                        game.init_queue()
+                        consistent = True
+                    setup = time.perf_counter()
+                    consistent = consistent and game.run_worklist()
+                    end = time.perf_counter()
+                    setup_time = min(setup_time, setup - start)
+                    ac3_time = min(ac3_time, end - setup)
+                writer.writerow([sudoku_number, init_mode, int(consistent and game.valid_solution()), game.arc_revisions,
+                                 game.queue_pushes, game.queue_pops, f"{setup_time * 1e6:.1f}", f"{ac3_time * 1e6:.1f}"])
+
+    print(f"Benchmark results written to {csv_filepath}")
+
+def memory_per_board(make_board, boards=1000):
+    """Average number of bytes held by one board, measured with tracemalloc over many boards kept alive at once"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = [make_board() for _ in range(boards)]
+        held = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del kept
+    return held / boards
+
+def benchmark_memory(boards=1000) -> None:
+    """Benchmark the memory held per board, as parsed Sudoku objects and as snapshots, results go to a single CSV file in the Benchmarks folder."""
+    files = sorted(os.listdir(sudoku_folder), key=lambda f: int(f.replace("Sudoku", "").replace(".txt", "")))
+    csv_filepath = os.path.join(benchmark_folder, "benchmark_memory.csv")
+
+    with open(csv_filepath, mode='w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(["Sudoku_Number", "Representation", "Boards", "Bytes_Per_Board"])
+        for sudoku_number, filename in enumerate(files, start=1):
+            puzzle = Sudoku(os.path.join(sudoku_folder, filename)).to_string()
+            unsolved = Sudoku(puzzle=puzzle).snapshot()
+            representations = {
+                "Sudoku": lambda: Sudoku(puzzle=puzzle),
+                "Snapshot": lambda: Sudoku(snapshot=unsolved).snapshot(),
+            }
+            for representation, make_board in representations.items():
+                writer.writerow([sudoku_number, representation, boards, f"{memory_per_board(make_board, boards):.0f}"])
+
+    print(f"Benchmark results written to {csv_filepath}")
+
 if __name__ == "__main__":
     benchmark()
+    benchmark_engines()
+    benchmark_init()
+    benchmark_memory()
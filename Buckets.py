@@ -0,0 +1,89 @@
+
+# tie break policies between unset fields with the same (smallest) domain size
+TIE_BREAK_ANY = "any"        # no preference, the bitset buckets yield the lowest cell index for free
+TIE_BREAK_INDEX = "index"    # lowest cell index, i.e. the first field in row-major order like a full scan would pick
+TIE_BREAK_DEGREE = "degree"  # the field constraining the most unset fields, then the lowest cell index
+
+
+class DomainBuckets:
+    """
+    The unset fields of a board, grouped by domain size, so the most constrained field (MRV) and the
+    "every field is set" test are available without scanning the board.
+    The owner has to report every change: fields being set or unset (remove / add) and domain changes of unset fields (resize).
+
+    Fields:
+    buckets: buckets[size] is the bitset of the unset fields with that domain size, bit i standing for cell i.
+        A bitset keeps its cells in index order, so the lowest one is the lowest set bit, found without a scan.
+    size_of: the bucket of every cell, -1 for fields that are set
+    unset: number of unset fields
+    """
+
+    def __init__(self, cells, peers, tie_break=TIE_BREAK_INDEX, max_domain_size=9):
+        """
+        :param cells: the Fields of the board, by cell index
+        :param peers: peer table of the topology, used by the degree tie break
+        :param tie_break: one of the TIE_BREAK_ policies
+        """
+        self.peers = peers
+        self.tie_break = tie_break
+        self.buckets = [0] * (max_domain_size + 1)
+        self.size_of = [-1] * len(cells)
+        self.unset = 0
+        for field in cells:
+            if field.get_value() == 0:
+                self.add(field.get_index(), field.get_domain_mask())
+
+    def add(self, cell, mask):
+        """An unset field enters the buckets, with its current domain mask"""
+        size = mask.bit_count()
+        self.size_of[cell] = size
+        self.buckets[size] |= 1 << cell
+        self.unset += 1
+
+    def remove(self, cell):
+        """A field is being set, it leaves the buckets"""
+        self.buckets[self.size_of[cell]] &= ~(1 << cell)
+        self.size_of[cell] = -1
+        self.unset -= 1
+
+    def resize(self, cell, mask):
+        """The domain of a field changed, moves it to its new bucket if it is unset"""
+        old_size = self.size_of[cell]
+        if old_size == -1:
+            return
+        size = mask.bit_count()
+        if size != old_size:
+            bit = 1 << cell
+            self.buckets[old_size] &= ~bit
+            self.buckets[size] |= bit
+            self.size_of[cell] = size
+
+    def pick(self):
+        """
+        The unset field with the smallest domain, according to the tie break policy.
+        The index and any policies take the lowest set bit of the bucket, constant time whatever the size of the bucket.
+        The degree tie break has to look at every field of the bucket.
+        @return: cell index, or -1 if every field is set
+        """
+        for bucket in self.buckets:
+            if bucket:
+                if self.tie_break == TIE_BREAK_DEGREE:
+                    return min(self._cells(bucket), key=self._degree_key)
+                return (bucket & -bucket).bit_length() - 1
+        return -1
+
+    @staticmethod
+    def _cells(bucket):
+        """The cell indices of a bucket, in increasing order"""
+        while bucket:
+            low = bucket & -bucket
+            yield low.bit_length() - 1
+            bucket ^= low
+
+    def _degree_key(self, cell):
+        size_of = self.size_of
+        unset_peers = 0
+        for peer in self.peers[cell]:
+            if size_of[peer] != -1:
+                unset_peers += 1
+        return -unset_peers, cell
@@ -0,0 +1,271 @@
+"""
+Canonical form of 9x9 puzzles under the sudoku symmetries, and a solution cache keyed by it.
+
+Two puzzles are equivalent if one can be turned into the other by relabelling the digits, permuting the rows within
+a band, the columns within a stack, the bands, the stacks, and transposing. Equivalent puzzles have equivalent solutions,
+so one solve answers all of them.
+
+The canonical form is the lexicographically smallest board over a set of candidate transforms:
+1. for both orientations, every row, column and digit gets a signature built only from the structure of the givens
+   (how many givens, in which lines, stacks and bands, sharing digits with which others), refined over a few rounds
+2. bands are ordered by the signatures of their rows and rows within a band by their own signatures, same for stacks and
+   columns; only lines (or bands, stacks) with equal signatures can still be ordered either way
+3. the orders that remain are tried, up to tie_budget of them per orientation, each relabelling the digits by first
+   appearance, and the smallest resulting board is the canonical form
+
+The signatures are invariant under the symmetries, so equivalent puzzles try the same candidate boards and get the same
+canonical form, as long as their ties fit in the budget. Beyond it, equivalent puzzles may get different forms: that
+only costs cache hits, never correctness, since any candidate transform maps solutions back exactly.
+"""
+import sqlite3
+from collections import OrderedDict
+from itertools import islice, permutations, product
+from Engines import make_game
+from Sudoku import Sudoku, BLANKS
+
+SIZE = 9
+BOX = 3
+default_tie_budget = 64  # candidate orders tried per orientation when signatures tie
+refinement_rounds = 2
+
+
+class Transform:
+    """
+    A symmetry of the board: optional transposition, then a row order, a column order and a digit relabelling.
+    transpose: whether the board is transposed first
+    rows, cols: the row (column) of the transposed or not board that ends up at each position
+    labels: list, labels[d] is the digit that d becomes, for d in 1..9 (labels[0] is 0, unset stays unset)
+    """
+
+    def __init__(self, transpose, rows, cols, labels):
+        self.transpose = transpose
+        self.rows = rows
+        self.cols = cols
+        self.labels = labels
+        # position in the original board of every position of the transformed board
+        self.source = [_orient(rows[r] * SIZE + cols[c], transpose) for r in range(SIZE) for c in range(SIZE)]
+
+    def apply(self, board):
+        """Transforms a board (puzzle or solution), as an 81 character string"""
+        labels = self.labels
+        return "".join(str(labels[int(board[i])]) for i in self.source)
+
+    def invert(self, board):
+        """Maps a transformed board (e.g. the solution of the canonical puzzle) back to the original board"""
+        digits = [0] * (SIZE + 1)
+        for digit, label in enumerate(self.labels):
+            digits[label] = digit
+        original = [0] * (SIZE * SIZE)
+        for position, i in enumerate(self.source):
+            original[i] = digits[int(board[position])]
+        return "".join(str(d) for d in original)
+
+
+def _orient(cell, transpose):
+    """Index of a cell of the transposed or not board in the original board"""
+    return (cell % SIZE) * SIZE + cell // SIZE if transpose else cell
+
+
+def _ranks(signatures):
+    """Replaces every signature by its rank among the distinct signatures, keeping them small for the next round"""
+    order = {sig: rank for rank, sig in enumerate(sorted(set(signatures)))}
+    return [order[sig] for sig in signatures]
+
+
+def _signatures(grid):
+    """
+    Structural signatures of the rows and columns of a board, invariant under the symmetries (except transposition,
+    which swaps the two)
+    :param grid: list of 81 digits, 0 for unset fields
+    :return: (row signatures, column signatures), lists of 9 integers
+    """
+    in_row = [[(c, grid[r * SIZE + c]) for c in range(SIZE) if grid[r * SIZE + c]] for r in range(SIZE)]
+    in_col = [[(r, grid[r * SIZE + c]) for r in range(SIZE) if grid[r * SIZE + c]] for c in range(SIZE)]
+    row_sig = [len(cells) for cells in in_row]
+    col_sig = [len(cells) for cells in in_col]
+    digit_sig = [0] * (SIZE + 1)
+    for d in grid:
+        digit_sig[d] += 1
+
+    for _ in range(refinement_rounds):
+        band_sig = [tuple(sorted(row_sig[b * BOX:(b + 1) * BOX])) for b in range(BOX)]
+        stack_sig = [tuple(sorted(col_sig[s * BOX:(s + 1) * BOX])) for s in range(BOX)]
+        rows = [(row_sig[r], band_sig[r // BOX],
+                 tuple(sorted((col_sig[c], stack_sig[c // BOX], digit_sig[d]) for c, d in in_row[r])))
+                for r in range(SIZE)]
+        cols = [(col_sig[c], stack_sig[c // BOX],
+                 tuple(sorted((row_sig[r], band_sig[r // BOX], digit_sig[d]) for r, d in in_col[c])))
+                for c in range(SIZE)]
+        digits = [tuple(sorted((row_sig[r], col_sig[c]) for r in range(SIZE) for c in range(SIZE)
+                               if grid[r * SIZE + c] == d)) for d in range(SIZE + 1)]
+        row_sig, col_sig, digit_sig = _ranks(rows), _ranks(cols), _ranks(digits)
+    return row_sig, col_sig
+
+
+def _tie_orders(items, key):
+    """Every order of items sorted by key, ties broken either way"""
+    groups = []
+    for item in sorted(items, key=key):
+        if groups and key(groups[-1][0]) == key(item):
+            groups[-1].append(item)
+        else:
+            groups.append([item])
+    for choice in product(*(permutations(group) for group in groups)):
+        yield [item for group in choice for item in group]
+
+
+def _line_orders(sig):
+    """Every order of the 9 lines consistent with sorting the bands, then the lines within each band, by signature"""
+    def band_key(band):
+        return sorted(sig[band * BOX:(band + 1) * BOX])
+
+    for bands in _tie_orders(range(BOX), band_key):
+        within = [_tie_orders(range(band * BOX, (band + 1) * BOX), sig.__getitem__) for band in bands]
+        for lines in product(*within):
+            yield [line for band in lines for line in band]
+
+
+def _relabel(cells):
+    """
+    Relabels the digits by first appearance
+    :return: (relabelled cells, labels as in Transform)
+    """
+    labels = [0] * (SIZE + 1)
+    next_label = 1
+    relabelled = []
+    for d in cells:
+        if d and not labels[d]:
+            labels[d] = next_label
+            next_label += 1
+        relabelled.append(labels[d])
+    # digits missing from the puzzle take the labels left, in order, so the relabelling is a bijection
+    for d in range(1, SIZE + 1):
+        if not labels[d]:
+            labels[d] = next_label
+            next_label += 1
+    return relabelled, labels
+
+
+def canonicalise(puzzle, tie_budget=default_tie_budget):
+    """
+    Canonical form of a puzzle, see the module docstring
+    :param puzzle: 81 character puzzle string ('0' or '.' for unset fields) or a Sudoku
+    :param tie_budget: candidate orders tried per orientation when signatures tie
+    :return: (canonical 81 character string, Transform turning the puzzle into it)
+    """
+    if isinstance(puzzle, Sudoku):
+        puzzle = puzzle.to_string()
+    for blank in BLANKS:
+        puzzle = puzzle.replace(blank, "0")
+    if len(puzzle) != SIZE * SIZE:
+        raise ValueError(f"Only 9x9 puzzles have a canonical form, got {len(puzzle)} fields")
+    best = None
+    for transpose in (False, True):
+        grid = [int(puzzle[_orient(i, transpose)]) for i in range(SIZE * SIZE)]
+        row_sig, col_sig = _signatures(grid)
+        for rows, cols in islice(product(list(_line_orders(row_sig)), list(_line_orders(col_sig))), tie_budget):
+            cells, labels = _relabel([grid[r * SIZE + c] for r in rows for c in cols])
+            if best is None or cells < best[0]:
+                best = (cells, transpose, rows, cols, labels)
+    cells, transpose, rows, cols, labels = best
+    return "".join(map(str, cells)), Transform(transpose, rows, cols, labels)
+
+
+class SolutionCache:
+    """
+    Size bounded LRU cache of solutions keyed by canonical form, with an optional persistent sqlite tier.
+    Solutions are stored for the canonical puzzle and mapped back through the transform of each lookup,
+    so every puzzle equivalent to a cached one is answered without solving.
+    Fields:
+    hits, misses: lookups answered (from memory or disk) or not
+    disk_hits: hits answered by the sqlite tier
+    """
+
+    def __init__(self, max_entries=100000, path=None, tie_budget=default_tie_budget):
+        """
+        :param max_entries: solutions kept in memory, the least recently used ones are evicted first
+        :param path: sqlite database file for the persistent tier, None to keep everything in memory
+        """
+        self.max_entries = max_entries
+        self.tie_budget = tie_budget
+        self.entries = OrderedDict()
+        self.db = None
+        if path is not None:
+            self.db = sqlite3.connect(path)
+            self.db.execute("CREATE TABLE IF NOT EXISTS solutions (canonical TEXT PRIMARY KEY, solution TEXT)")
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _remember(self, key, solution):
+        self.entries[key] = solution
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _lookup(self, key):
+        """Canonical solution of a canonical puzzle, "" if it is known to be unsolvable, None if unknown"""
+        solution = self.entries.get(key)
+        if solution is not None:
+            self.entries.move_to_end(key)
+            return solution
+        if self.db is not None:
+            row = self.db.execute("SELECT solution FROM solutions WHERE canonical = ?", (key,)).fetchone()
+            if row is not None:
+                self.disk_hits += 1
+                self._remember(key, row[0])
+                return row[0]
+        return None
+
+    def get(self, puzzle):
+        """
+        :param puzzle: 81 character puzzle string or a Sudoku
+        :return: the solution of the puzzle, "" if it is known to be unsolvable, None if it is not cached
+        """
+        key, transform = canonicalise(puzzle, self.tie_budget)
+        solution = self._lookup(key)
+        if solution is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return transform.invert(solution) if solution else ""
+
+    def put(self, puzzle, solution):
+        """
+        Caches the solution of a puzzle
+        :param solution: 81 character solution string, None or "" if the puzzle is unsolvable
+        """
+        key, transform = canonicalise(puzzle, self.tie_budget)
+        self._store(key, transform.apply(solution) if solution else "")
+
+    def _store(self, key, canonical_solution):
+        self._remember(key, canonical_solution)
+        if self.db is not None:
+            self.db.execute("INSERT OR REPLACE INTO solutions VALUES (?, ?)", (key, canonical_solution))
+            self.db.commit()
+
+    def solve(self, puzzle, engine="fc", h_type=-1):
+        """
+        Answers from the cache, or solves the canonical puzzle with the full solver of an engine and caches it
+        :param puzzle: 81 character puzzle string or a Sudoku
+        :return: the solution as an 81 character string, None if the puzzle is unsolvable
+        """
+        key, transform = canonicalise(puzzle, self.tie_budget)
+        solution = self._lookup(key)
+        if solution is None:
+            self.misses += 1
+            game = make_game(engine, Sudoku(puzzle=key), h_type, True)
+            solved = game.set_fields_consistent() and game.full_solver() and game.valid_solution()
+            solution = game.sudoku.to_string() if solved else ""
+            self._store(key, solution)
+        else:
+            self.hits += 1
+        return transform.invert(solution) if solution else None
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
@@ -0,0 +1,257 @@
+"""
+Packed binary corpus of puzzles, read through mmap with random access to every record.
+
+Layout, all integers little endian:
+- header, 16 bytes: magic b"SDKC", format version, box size, bits per field, a padding byte, number of records (64 bits)
+- the records, back to back, all of the same size: the values of the fields in row-major order, 0 for unset fields.
+  Boards with values up to 15 (9x9 and smaller) take 4 bits per field, two fields per byte with the first one in the
+  high nibble: a 9x9 puzzle is 41 bytes instead of an 82 byte text line. Larger boards take a byte per field.
+
+Record i starts at HEADER_SIZE + i * record_size, so reading it is a slice of the mapped file: Corpus.record returns a
+memoryview of it without copying anything. The file is mapped read only, so any number of worker processes can open
+the same corpus and share its pages instead of each reading and parsing a text file.
+"""
+import mmap
+import os
+import struct
+from Sudoku import Sudoku, SYMBOLS, box_size_for
+
+MAGIC = b"SDKC"
+VERSION = 1
+HEADER = struct.Struct("<4sBBBxQ")
+HEADER_SIZE = HEADER.size
+
+
+def _symbol_table():
+    """Value of every symbol of the puzzle strings as a byte, see Sudoku.parse_puzzle, 255 for any other character"""
+    table = bytearray([255] * 256)
+    table[ord("0")] = table[ord(".")] = 0
+    for value, symbol in enumerate(SYMBOLS, start=1):
+        table[ord(symbol)] = table[ord(symbol.lower())] = value
+    return bytes(table)
+
+
+_values_of_symbols = _symbol_table()
+# inverse, bytes of values back to the symbols, 0 becoming '0'
+_symbols_of_values = bytes.maketrans(bytes(range(len(SYMBOLS) + 1)), b"0" + SYMBOLS.encode())
+_shift_high = bytes.maketrans(bytes(range(16)), bytes(v << 4 for v in range(16)))
+_high_nibble = bytes.maketrans(bytes(range(256)), bytes(b >> 4 for b in range(256)))
+_low_nibble = bytes.maketrans(bytes(range(256)), bytes(b & 15 for b in range(256)))
+
+
+def bits_per_field(box_size):
+    """4 bits per field if every value fits in a nibble, 8 otherwise"""
+    return 4 if box_size * box_size <= 15 else 8
+
+
+def record_size(box_size):
+    """Bytes per record of a corpus of boards of the given box size"""
+    field_count = box_size ** 4
+    return (field_count + 1) // 2 if bits_per_field(box_size) == 4 else field_count
+
+
+def encode_puzzle(puzzle, box_size):
+    """
+    Packs a puzzle into a record
+    :param puzzle: puzzle string with one symbol per field (see Sudoku.to_string) or a Sudoku
+    :return: bytes of record_size(box_size)
+    @raise ValueError: if the puzzle doesn't have the fields of a board of the given box size
+    """
+    if isinstance(puzzle, Sudoku):
+        puzzle = puzzle.to_string()
+    values = puzzle.encode("ascii").translate(_values_of_symbols)
+    if len(values) != box_size ** 4 or max(values) > box_size * box_size:
+        raise ValueError(f"Not a puzzle with box size {box_size}: {puzzle!r}")
+    if bits_per_field(box_size) == 8:
+        return values
+    if len(values) % 2:
+        values += b"\0"
+    # high nibbles from the even fields, low nibbles from the odd ones; no two bits overlap, so one big OR packs them
+    high = int.from_bytes(values[0::2].translate(_shift_high), "big")
+    low = int.from_bytes(values[1::2], "big")
+    return (high | low).to_bytes(len(values) // 2, "big")
+
+
+def decode_record(record, box_size):
+    """
+    Inverse of encode_puzzle
+    :param record: bytes or memoryview of a record
+    :return: the puzzle string, '0' for unset fields
+    """
+    record = bytes(record)
+    if bits_per_field(box_size) == 8:
+        values = record
+    else:
+        values = bytearray(2 * len(record))
+        values[0::2] = record.translate(_high_nibble)
+        values[1::2] = record.translate(_low_nibble)
+        values = bytes(values[:box_size ** 4])
+    return values.translate(_symbols_of_values).decode("ascii")
+
+
+def write_corpus(path, puzzles, box_size=None):
+    """
+    Writes puzzles to a corpus file, streaming: only one puzzle is held in memory at a time.
+    The records go to path + ".part" first, which replaces path once complete, so a failure never leaves a half written
+    corpus behind, nor destroys the corpus already at path.
+    :param puzzles: iterable of puzzle strings (one symbol per field) or Sudoku objects
+    :param box_size: box size of the puzzles, None to infer it from the first one
+    :return: number of records written
+    """
+    partial = path + ".part"
+    count = 0
+    # outside of the try: if the file can't even be created, there is nothing to clean up and its error is the one raised
+    file = open(partial, "wb")
+    try:
+        with file:
+            # the header is written again once the number of records is known
+            file.write(bytes(HEADER_SIZE))
+            for puzzle in puzzles:
+                if isinstance(puzzle, Sudoku):
+                    puzzle = puzzle.to_string()
+                if box_size is None:
+                    box_size = box_size_for(len(puzzle))
+                file.write(encode_puzzle(puzzle, box_size))
+                count += 1
+            if box_size is None:
+                box_size = 3  # nothing written, an empty 9x9 corpus
+            file.seek(0)
+            file.write(HEADER.pack(MAGIC, VERSION, box_size, bits_per_field(box_size), count))
+        os.replace(partial, path)
+    except BaseException:
+        os.remove(partial)
+        raise
+    return count
+
+
+def is_corpus(path):
+    """True if the file at path starts like a corpus"""
+    try:
+        with open(path, "rb") as file:
+            return file.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class Corpus:
+    """
+    A corpus file mapped read only, see the module docstring.
+        with Corpus("puzzles.sdk") as corpus:
+            corpus[i]           # puzzle string of record i
+            corpus.sudoku(i)    # parsed board of record i
+            corpus.record(i)    # memoryview of the packed record, no copy
+    Fields:
+    box_size: box size of the boards, 3 for 9x9
+    record_size: bytes per record
+    """
+
+    def __init__(self, path):
+        """
+        @raise ValueError: if the file is not a corpus, or is not as long as its header says
+        """
+        self.path = path
+        with open(path, "rb") as file:
+            # mmap refuses to map an empty file, and a corpus always has its header
+            if file.seek(0, 2) < HEADER_SIZE:
+                raise ValueError(f"{path} is not a corpus, it is shorter than the header")
+            self.mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.box_size, bits, self.count = HEADER.unpack_from(self.mapped)
+        if magic != MAGIC or version != VERSION or bits != bits_per_field(self.box_size):
+            self.mapped.close()
+            raise ValueError(f"{path} is not a version {VERSION} corpus")
+        self.record_size = record_size(self.box_size)
+        if len(self.mapped) != HEADER_SIZE + self.count * self.record_size:
+            self.mapped.close()
+            raise ValueError(f"{path} should hold {self.count} records of {self.record_size} bytes, it is truncated")
+        self.view = memoryview(self.mapped)
+
+    def __len__(self):
+        return self.count
+
+    def record(self, index):
+        """
+        The packed record at index, a slice of the mapped file: nothing is copied, and the memoryview must be released
+        (or dropped) before the corpus is closed
+        """
+        if not 0 <= index < self.count:
+            raise IndexError(f"Record {index} out of range, the corpus holds {self.count}")
+        start = HEADER_SIZE + index * self.record_size
+        return self.view[start:start + self.record_size]
+
+    def __getitem__(self, index):
+        """The puzzle string at index, negative indices count from the end"""
+        if index < 0:
+            index += self.count
+        with self.record(index) as record:
+            return decode_record(record, self.box_size)
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self[index]
+
+    def sudoku(self, index):
+        """The board of the puzzle at index"""
+        return Sudoku(puzzle=self[index], box_size=self.box_size)
+
+    def close(self):
+        if self.mapped is not None:
+            self.view.release()
+            self.mapped.close()
+            self.mapped = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def text_to_corpus(source, path, use_mmap=False):
+    """
+    Packs a text corpus, see PuzzleReader.read_puzzles, or a folder of board files like the Sudokus folder
+    :param source: text file, '-' for stdin, or a folder
+    :return: number of records written
+    """
+    if os.path.isdir(source):
+        files = sorted(os.listdir(source))
+        return write_corpus(path, (Sudoku(os.path.join(source, f)) for f in files))
+    from PuzzleReader import read_puzzles
+    return write_corpus(path, read_puzzles(source, use_mmap))
+
+
+def corpus_to_text(path, target):
+    """
+    Unpacks a corpus to text, one puzzle per line
+    :param target: file path, or an open text file object
+    :return: number of puzzles written
+    """
+    if isinstance(target, str):
+        with open(target, "w") as file:
+            return corpus_to_text(path, file)
+    with Corpus(path) as corpus:
+        for puzzle in corpus:
+            target.write(puzzle + "\n")
+        return len(corpus)
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Convert puzzles between text and the packed binary corpus format.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    pack = subparsers.add_parser("pack", help="text (one puzzle per line) or a folder of board files to a corpus")
+    pack.add_argument("source", help="puzzle file, '-' for stdin, or a folder like Sudokus")
+    pack.add_argument("corpus")
+    pack.add_argument("--mmap", action="store_true", help="memory-map the puzzle file")
+    unpack = subparsers.add_parser("unpack", help="corpus to text, one puzzle per line")
+    unpack.add_argument("corpus")
+    unpack.add_argument("target", nargs="?", default="-", help="output file, '-' for stdout")
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        written = text_to_corpus(args.source, args.corpus, args.mmap)
+        print(f"{written} puzzles packed into {args.corpus} ({os.path.getsize(args.corpus)} bytes)")
+    else:
+        corpus_to_text(args.corpus, sys.stdout if args.target == "-" else args.target)
@@ -0,0 +1,246 @@
+from Game import Game
+from Sudoku import symbol_of
+from Domain import mask_to_values
+
+
+class DancingLinks:
+    """
+    Knuth's Algorithm X on a sparse 0/1 matrix stored as dancing links, with the links in flat integer lists
+    (left, right, up, down, column of every node) rather than one object per node.
+    Node 0 is the root, nodes 1..column_count are the column headers, the row nodes follow.
+    """
+
+    def __init__(self, column_count):
+        headers = column_count + 1
+        self.left = [i - 1 for i in range(headers)]
+        self.right = [i + 1 for i in range(headers)]
+        self.left[0] = column_count
+        self.right[column_count] = 0
+        self.up = list(range(headers))
+        self.down = list(range(headers))
+        self.column = list(range(headers))
+        self.size = [0] * headers
+        self.row_of = [-1] * headers
+        self.first_node = {}  # row id -> one node of that row
+        self.covered = [False] * headers
+        self.nodes = 0  # rows tried by the search
+
+    def add_row(self, row_id, columns):
+        """
+        Appends a row with a 1 in each of the given columns (numbered from 1)
+        :param row_id: identifier reported in solutions
+        """
+        first = len(self.column)
+        for i, col in enumerate(columns):
+            node = first + i
+            self.column.append(col)
+            self.row_of.append(row_id)
+            # vertical: insert at the bottom of the column
+            self.up.append(self.up[col])
+            self.down.append(col)
+            self.down[self.up[col]] = node
+            self.up[col] = node
+            self.size[col] += 1
+            # horizontal: circular list of the row
+            self.left.append(first + i - 1 if i > 0 else first + len(columns) - 1)
+            self.right.append(first + i + 1 if i < len(columns) - 1 else first)
+        self.first_node[row_id] = first
+
+    def cover(self, col):
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        right[left[col]] = right[col]
+        left[right[col]] = left[col]
+        self.covered[col] = True
+        i = down[col]
+        while i != col:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                size[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(self, col):
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        i = up[col]
+        while i != col:
+            j = left[i]
+            while j != i:
+                size[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[col]] = col
+        left[right[col]] = col
+        self.covered[col] = False
+
+    def select(self, row_id):
+        """
+        Puts a row into every solution up front, e.g. a given of the puzzle
+        :return: False if the row conflicts with a row selected before
+        """
+        first = self.first_node[row_id]
+        node = first
+        while True:
+            if self.covered[self.column[node]]:
+                return False
+            node = self.right[node]
+            if node == first:
+                break
+        node = first
+        while True:
+            self.cover(self.column[node])
+            node = self.right[node]
+            if node == first:
+                return True
+
+    def solve(self, limit=1):
+        """
+        Finds up to limit exact covers of the columns that are left
+        :return: list of solutions, each a list of the row ids chosen by the search
+        """
+        solutions = []
+        self._search([], solutions, limit)
+        return solutions
+
+    def _search(self, partial, solutions, limit):
+        right, down, column, size = self.right, self.down, self.column, self.size
+        if right[0] == 0:
+            solutions.append(list(partial))
+            return len(solutions) >= limit
+
+        # the column with the fewest rows left, the exact cover counterpart of MRV
+        col = right[0]
+        best = col
+        while col != 0:
+            if size[col] < size[best]:
+                best = col
+                if size[col] <= 1:
+                    break
+            col = right[col]
+        if size[best] == 0:
+            return False
+
+        self.cover(best)
+        i = down[best]
+        while i != best:
+            self.nodes += 1
+            partial.append(self.row_of[i])
+            j = right[i]
+            while j != i:
+                self.cover(column[j])
+                j = right[j]
+            done = self._search(partial, solutions, limit)
+            j = self.left[i]
+            while j != i:
+                self.uncover(column[j])
+                j = self.left[j]
+            partial.pop()
+            if done:
+                self.uncover(best)
+                return True
+            i = down[i]
+        self.uncover(best)
+        return False
+
+
+class DLXGame(Game):
+    """
+    Solver engine encoding the sudoku as an exact cover problem, solved with dancing links.
+    Every (field, value) pair is a row covering 4 of the 4 * cell_count constraints (324 on a 9x9 board): the field has
+    a value, and the value appears in the row, the column and the block of the field. Set fields are selected up front,
+    and only the values left in the domains of the unset fields become rows, so propagation done before (AC-3 or stronger)
+    shrinks the matrix.
+
+    It takes a Sudoku like Game and keeps Game's interface (full_solver, valid_solution, show_sudoku, counters),
+    so callers can pick the engine, see Engines.py.
+    """
+
+    def __init__(self, sudoku, h_type=-1, benchmarking_mode=False, **kwargs):
+        super().__init__(sudoku, h_type, benchmarking_mode, **kwargs)
+        self.links = None
+
+    @property
+    def nodes(self):
+        return 0 if self.links is None else self.links.nodes
+
+    def build_links(self):
+        """
+        Builds the exact cover matrix of the current board
+        :return: the DancingLinks, or None if two set fields already conflict
+        """
+        topology = self.topology
+        size = topology.size
+        cell_count = topology.cell_count
+        links = DancingLinks(4 * cell_count)
+        selected = []
+        for field in self.cells:
+            cell = field.get_index()
+            values = [field.get_value()] if field.get_value() != 0 else mask_to_values(field.get_domain_mask())
+            for value in values:
+                digit = value - 1
+                links.add_row(cell * size + digit, (
+                    1 + cell,
+                    1 + cell_count + topology.cell_row[cell] * size + digit,
+                    1 + 2 * cell_count + topology.cell_col[cell] * size + digit,
+                    1 + 3 * cell_count + topology.cell_box[cell] * size + digit,
+                ))
+            if field.get_value() != 0:
+                selected.append(cell * size + field.get_value() - 1)
+
+        for row_id in selected:
+            if not links.select(row_id):
+                return None
+        return links
+
+    def full_solver(self, propagation_level=None):
+        """
+        Solves the board with dancing links.
+        :param propagation_level: None to go straight to the exact cover search, otherwise the level of Game.propagate
+            to run first
+        :return: True if a solution was found and written to the board
+        """
+        if propagation_level is not None and not self.propagate(propagation_level):
+            return False
+        self.links = self.build_links()
+        if self.links is None:
+            return False
+        with self.instrumentation.span("dlx"):
+            solutions = self.links.solve(1)
+        self.instrumentation.record(self)
+        if not solutions:
+            return False
+        self.write_solution(solutions[0])
+        return True
+
+    def count_solutions(self, limit=2, propagation_level=None):
+        """
+        Counts the exact covers of the board, stopping as soon as limit are found, see Game.count_solutions.
+        The solutions are kept in self.solutions, the board itself is not changed.
+        :param propagation_level: None to go straight to the exact cover search, otherwise the level of Game.propagate
+            to run first
+        """
+        self.solutions = []
+        if propagation_level is not None and not self.propagate(propagation_level):
+            return 0
+        self.links = self.build_links()
+        if self.links is None:
+            return 0
+        size = self.topology.size
+        for row_ids in self.links.solve(limit):
+            solution = [field.get_value() for field in self.cells]
+            for row_id in row_ids:
+                cell, digit = divmod(row_id, size)
+                solution[cell] = digit + 1
+            self.solutions.append("".join(symbol_of(value) for value in solution))
+        return len(self.solutions)
+
+    def write_solution(self, row_ids):
+        size = self.topology.size
+        for row_id in row_ids:
+            cell, digit = divmod(row_id, size)
+            field = self.cells[cell]
+            field.set_value(digit + 1)
+            field.set_domain_mask(1 << digit)
@@ -0,0 +1,60 @@
+"""
+Helpers for the bitmask domain representation used by Field.
+
+A domain is stored as a single integer where bit (v - 1) is set iff the value v is still a candidate.
+For a regular 9x9 sudoku this is a 9-bit mask, 0b111111111 being the full domain {1..9}.
+Python integers have no fixed width, so the same helpers work for any board size, e.g. 25-bit masks on 25x25 boards.
+Domain sizes are counted with int.bit_count.
+"""
+
+DOMAIN_SIZE = 9
+FULL_DOMAIN = (1 << DOMAIN_SIZE) - 1
+
+# popcount lookup table for every possible 9-bit domain, for the vectorised 9x9 propagation (BatchPropagation.py)
+POPCOUNT = tuple(bin(mask).count("1") for mask in range(FULL_DOMAIN + 1))
+
+
+def full_domain(size):
+    """The mask of every value from 1 to size"""
+    return (1 << size) - 1
+
+
+def value_to_bit(value):
+    """
+    Convert a value into its domain bit
+    @param value: value between 1 and the board size, 0 (unset) maps to the empty mask
+    @return: integer with only the bit of the value set
+    """
+    return 1 << (value - 1) if value > 0 else 0
+
+
+def bit_to_value(bit):
+    """Inverse of value_to_bit, for a mask with exactly one bit set"""
+    return bit.bit_length()
+
+
+def is_singleton(mask):
+    """Does the mask contain exactly one value? (single-bit test, no counting needed)"""
+    return mask != 0 and mask & (mask - 1) == 0
+
+
+def mask_to_values(mask):
+    """
+    Expand a mask into the list of values it contains, in ascending order
+    @param mask: domain mask
+    @return: list of values
+    """
+    values = []
+    while mask:
+        bit = mask & -mask
+        values.append(bit.bit_length())
+        mask ^= bit
+    return values
+
+
+def values_to_mask(values):
+    """Build a mask out of an iterable of values"""
+    mask = 0
+    for value in values:
+        mask |= value_to_bit(value)
+    return mask
@@ -0,0 +1,31 @@
+from Game import Game
+from DLX import DLXGame
+
+# solver engines by name, all of them take a Sudoku and share the interface of Game
+ENGINES = {
+    "fc": Game,      # AC-3, then backtracking search with forward checking
+    "dlx": DLXGame,  # exact cover with dancing links
+}
+
+# from this box size up (25x25), forward checking with the lowest value first easily thrashes for minutes in a wrong
+# subtree of the first levels, even on an empty board, while the exact cover columns of DLX see through it
+DLX_FROM_BOX_SIZE = 5
+
+
+def default_engine(box_size):
+    """The engine boards of the given box size are solved with when none is asked for: fc up to 16x16, dlx above"""
+    return "dlx" if box_size >= DLX_FROM_BOX_SIZE else "fc"
+
+
+def make_game(engine, sudoku, h_type, benchmarking_mode, **options):
+    """
+    Creates the solver of the given engine for a sudoku
+    :param engine: a key of ENGINES, None for the default engine of the size of the board, see default_engine
+    :param h_type: heuristic type used by AC-3, see Game
+    :param options: further keyword arguments of Game, e.g. instrumentation
+    """
+    if engine is None:
+        engine = default_engine(sudoku.topology.box_size)
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}, pick one of {', '.join(ENGINES)}")
+    return ENGINES[engine](sudoku, h_type, benchmarking_mode, **options)
@@ -1,44 +1,35 @@
+from Domain import FULL_DOMAIN, value_to_bit, bit_to_value, mask_to_values
+
+
 class Field:
+    # no __dict__ per field: a board is 81 of them, and batch work keeps many boards in memory
+    __slots__ = ("value", "domain", "index")
+
     # region constructors
 
-    def __init__(self, *args):
+    def __init__(self, *args, full_domain=FULL_DOMAIN):
+        """
+        Field() is unset, with every value in its domain, Field(value) is set to value
+        :param full_domain: the domain of an unset field, FULL_DOMAIN on a 9x9 board, see Domain.full_domain
+        """
 
         self.value = 0
-        self.domain = []
-        # A list of all the fields that this field is constrained by
-        self.neighbours = []
-        self.priority = -1 #used in case heuristics are requested during the AC-3 algorithm
-
+        # The domain is a bitmask, bit (v - 1) is set iff v is still a candidate. See Domain.py
+        self.domain = 0
+        # Position of the field on the board (row * size + col), neighbours are looked up in Topology with it
+        self.index = -1
 
         # Constructor in case the field is unknown
         if len(args) == 0:
-            for i in range(1, 10):
-                self.domain.append(i)
+            self.domain = full_domain
 
         # Constructor in case the field is known, i.e., it contains a value
         if len(args) == 1:
             self.value = args[0]
-            self.domain = []
+            self.domain = 0
 
     # endregion
 
-    # region overloaded comparison operators, used in case of heuristics during AC-3
-
-    # explanation on why this is needed:
-    # during heuristic comparison, heapq has a tuple of priority and arc (prio, arc)
-    # if priority values are the same, python will try to compare arcs, which is a tuple of fields (field, field)
-    # in the same fashion, this will lead to python comparing two fields, which does not make sense in the context of sudoku, and these particular heuristics
-    # therefore I introduced a dummy field priority and overloaded the lt operator, now all fields are "equal"
-    # This means that the two tuples of (priority, arc) are always equal if priority is equal, because arcs are always "equal"
-    # This is the exact behaviour we want, and it is always deterministic.
-
-    # This is a dirty cheat, and should be killed with fire in the future, but idk I'm too lazy.
-
-    def __lt__(self, other):
-        return self.priority == other.priority
-    
-    #endregion
-
     # region value functions
 
     def is_finalized(self):
@@ -60,33 +51,36 @@ class Field:
 
     # endregion
 
-    # region neighbor functions
+    # region index functions
 
-    def set_neighbours(self, neighbours):
-        self.neighbours = neighbours
+    def set_index(self, index):
+        self.index = index
 
-    def get_neighbours(self):
-        return self.neighbours
-
-    def get_other_neighbours(self, b):
-        """
-        Return all neighbours of this field except neighbour b
-        @param b:
-        @return: All neighbors of this Field except b
-        """
-        new_neighbours = self.neighbours.copy()
-        new_neighbours.remove(b)
-        return new_neighbours
+    def get_index(self):
+        return self.index
 
     # endregion
 
     # region domain functions
 
     def get_domain(self):
+        """
+        Expands the domain mask into a list of values, in ascending order.
+        Only meant for iterating over candidates, hot paths should use get_domain_mask()
+        """
+        return mask_to_values(self.domain)
+
+    def get_domain_mask(self):
         return self.domain
 
+    def set_domain_mask(self, mask):
+        self.domain = mask
+
     def get_domain_size(self):
-        return len(self.domain)
+        return self.domain.bit_count()
+
+    def has_in_domain(self, value):
+        return self.domain & value_to_bit(value) != 0
 
     def remove_from_domain(self, value):
         """
@@ -94,21 +88,22 @@ class Field:
         :param value: value to remove
         :return: true if the value was removed
         """
-        value_removed = self.domain.remove(value)
-        if len(self.domain) == 1:
-            self.set_value(self.domain[0])
-        return value_removed
+        bit = value_to_bit(value)
+        if not self.domain & bit:
+            return False
+        self.domain ^= bit
+        # single bit left, the field is decided
+        if self.domain and self.domain & (self.domain - 1) == 0:
+            self.set_value(bit_to_value(self.domain))
+        return True
     
     def remove_from_domain_no_assign(self, value):
         """also removes given value from domain, but doesn't assign pre-emptively."""
-        self.domain.remove(value)
+        self.domain &= ~value_to_bit(value)
 
     def add_to_domain(self, value):
         """add the given value to the domain of the field, if not already present"""
-        if value in self.domain:
-            return
-        else:
-            self.domain.append(value)
+        self.domain |= value_to_bit(value)
 
     # endregion
 
@@ -1,13 +1,25 @@
-from queue import Queue
-import heapq
 from Sudoku import Sudoku
+from Worklist import FifoWorklist, PriorityWorklist
+from Trail import Trail
+from Search import Search, SOLVED, EXHAUSTED
+from Buckets import DomainBuckets, TIE_BREAK_INDEX
+from Propagation import propagate, rules_for_level
+from Domain import value_to_bit, bit_to_value, is_singleton
+from Instrumentation import NULL_INSTRUMENTATION
+
+# how AC_3 starts, see init_queue and init_from_givens
+INIT_ALL_ARCS = "arcs"   # every arc of the topology in the worklist
+INIT_GIVENS = "givens"   # eliminate the values of the set fields from their peers, then only the arcs of new singletons
 
 class Game:
 
-    def __init__(self, sudoku, h_type, benchmarking_mode):
+    def __init__(self, sudoku, h_type, benchmarking_mode, dedup_queue=False, tie_break=TIE_BREAK_INDEX,
+                 instrumentation=None, init_mode=INIT_ALL_ARCS):
         """Fields:
-        arc_queue: Used in case of no heuristic, a simple FIFO queue
-        arc_pqueue: A priority queue, implemented as a minimum heap. Used in case heuristicd are requested
+        worklist: the arc queue of AC-3, holding arc ids. See Worklist.py
+            In case of no heuristic, a simple FIFO queue
+            In case heuristics are requested, an indexed priority queue whose priorities follow the live domain sizes
+        topology: the shared Topology of the board. Arcs are integer ids into its arc tables, see Topology.py
         h_type: heuristic type: 
             -1 for no heuristic,
             0 for MRV only
@@ -17,17 +29,74 @@ class Game:
         benchmark_mode: boolean to control the actual output of functions, such as error reporting or sudoku printing.
             If True, nothing is ever printed.
             If false, error reporting and result printing is done.
-        
+        dedup_queue: if True, an arc is never pushed while it is still waiting in the queue, see put_neighbours_in_queue
+        queue_pushes, queue_pops: number of arcs pushed to and popped from the worklist by AC-3
+        trail: undo stack of the domain changes made by forward checking during backtracking, see Trail.py
+        search: the state of the last backtracking search, see Search.py. None until backtracker is called.
+        tie_break: how pick_unset_field chooses between fields with the same domain size, see Buckets.py
+        buckets: the unset fields grouped by domain size, maintained during the search. None until a search starts.
+        rule_firings: how many times each propagation rule beyond AC-3 narrowed domains, by rule name. See Propagation.py
+        solutions: the solutions found by the last count_solutions, as puzzle strings (see Sudoku.to_string)
+        wipeouts: number of domains that became empty, in AC-3 or in a forward check
+        instrumentation: timing spans, events and counter totals, see Instrumentation.py. Disabled unless one is given.
+        init_mode: how AC-3 fills its worklist, INIT_ALL_ARCS or INIT_GIVENS. Both reach the same domains.
+        solved_by_givens: True once AC-3 started from the givens (INIT_GIVENS) found that they alone decide every field,
+            consistently: the board is solved without any search. See init_from_givens.
+
         """
-        self.arc_queue = Queue()
-        self.arc_pqueue = [] # prio queue in case heuristics are used. This will be a list of type tuple (priority, arc).
         self.h_type = h_type
         self.sudoku = sudoku
+        self.topology = sudoku.topology
+        self.cells = sudoku.cells
         self.arc_revisions = 0
         self.benchmark_mode = benchmarking_mode
+        self.dedup_queue = dedup_queue
+        self.worklist = self.make_worklist()
+        self.trail = Trail(self.cells, self.topology.arc_count)
+        self.search = None
+        self.tie_break = tie_break
+        self.buckets = None
+        self.rule_firings = {}
+        self.solutions = []
+        self.wipeouts = 0
+        self.instrumentation = NULL_INSTRUMENTATION if instrumentation is None else instrumentation
+        self.init_mode = init_mode
+        self.solved_by_givens = False
+
+    def make_worklist(self):
+        """Creates an empty worklist with the discipline matching the heuristic type"""
+        if self.h_type == -1: # no heuristic requested
+            return FifoWorklist(self.topology.arc_count, self.dedup_queue)
+        return PriorityWorklist(self.topology.arc_count, self.heuristic_picker, self.dedup_queue)
+
+    @property
+    def queue_pushes(self):
+        return self.worklist.pushes
+
+    @property
+    def queue_pops(self):
+        return self.worklist.pops
+
+    @property
+    def nodes(self):
+        """number of assignments tried by the backtracking search"""
+        return 0 if self.search is None else self.search.nodes
+
+    def counters(self):
+        """The counters of this game by name, see Instrumentation.COUNTERS"""
+        search = self.search
+        return {
+            "arcs_popped": self.queue_pops,
+            "revisions": self.arc_revisions,
+            "wipeouts": self.wipeouts,
+            "nodes": self.nodes,
+            "backtracks": 0 if search is None else search.backtracks,
+            "max_depth": 0 if search is None else search.max_depth,
+        }
 
     def set_heuristic_type(self, h):
         self.h_type = h
+        self.worklist = self.make_worklist()
 
     def get_heuristic_type(self):
         return self.h_type
@@ -38,17 +107,16 @@ class Game:
     #functions for AC-3:
 
     def heuristic_picker(self, arc):
-        """Heuristic picker function to calculate a priority value according to the h_type field. Lower value is more prioritized."""
+        """Heuristic picker function to calculate an integer priority value according to the h_type field. Lower value is more prioritized."""
         heuristic_id = self.h_type
-        field1, field2 = arc
-        domain1_size = field1.get_domain_size()
-        domain2_size = field2.get_domain_size()
+        domain1_size = self.cells[self.topology.arc_src[arc]].get_domain_size()
+        domain2_size = self.cells[self.topology.arc_dst[arc]].get_domain_size()
         
         # MRV Heuristic only
         if heuristic_id == 0: 
             # Prioritize fields with the smallest non-zero domain sizes
             if domain1_size == 0 and domain2_size == 0:
-                return float('inf')
+                return self.topology.size + 1 # lower priority than any domain size
             if domain1_size == 0:
                 return domain2_size
             if domain2_size == 0:
@@ -82,21 +150,83 @@ class Game:
 
     def init_queue(self):
         """
-        Init the arc queue with the tuples
-        If heuristics are requested, priority is calculated before pushing to the pqueue.
-        """
-        # simply loop over every neighbour of every field and create a arc between them
-        for row in range (0,9):
-            for col in range (0,9):
-                field = self.sudoku.board[row][col]
-                neighbours = field.get_neighbours() 
-                for n in neighbours:
-                    arc = (field, n)
-                    if self.h_type == -1: # ne heuristic requested
-                        self.arc_queue.put(arc)
-                    else:
-                        prio = self.heuristic_picker(arc)
-                        heapq.heappush(self.arc_pqueue, (prio, arc))
+        Init the arc queue with every arc of the topology
+        If heuristics are requested, the priority queue calculates the priority on push, and AC_3 updates it when domains shrink.
+        """
+        # the topology already lists an arc between every field and each of its neighbours
+        with self.instrumentation.span("init_queue"):
+            push = self.worklist.push
+            for arc in range(self.topology.arc_count):
+                push(arc)
+
+    def init_from_givens(self) -> bool:
+        """
+        Givens driven start of AC-3, instead of init_queue.
+        An arc (x, y) can only revise x once y is down to one value, so the arcs towards fields with more values left
+        are never pushed. The values of the set fields are removed from the domains of their peers directly, which is
+        what revising the arcs towards them would do, and only the arcs towards fields this leaves with a single value
+        go to the worklist. On an easy puzzle that is a few dozen arcs instead of all of them (1620 on a 9x9 board).
+        Two set peers sharing a value, which AC-3 can't tell (see set_fields_consistent), are caught on the way.
+        A board without unset fields ends up with an empty worklist, so AC-3 is done as soon as this returns.
+        If no field is left with more than one value, the givens decide the whole board: AC_3 then only has to check the
+        new singles against each other, and reports the board in solved_by_givens.
+        @return: False if the board was found to be contradicted, True otherwise
+        """
+        with self.instrumentation.span("init_givens"):
+            cells = self.cells
+            peers = self.topology.peers
+            seeds = []
+            undecided = 0  # unset fields with more than one value left
+            for cell, field in enumerate(cells):
+                value = field.get_value()
+                mask = field.get_domain_mask()
+                if value:
+                    seeds.append((cell, value_to_bit(value)))
+                elif mask == 0:
+                    # an unset field without values, e.g. restored from a snapshot
+                    return self.contradiction(cell)
+                elif is_singleton(mask):
+                    seeds.append((cell, mask))
+                else:
+                    undecided += 1
+
+            singles = []
+            for cell, bit in seeds:
+                for n in peers[cell]:
+                    neighbour = cells[n]
+                    value = neighbour.get_value()
+                    mask = neighbour.get_domain_mask()
+                    if value:
+                        if value_to_bit(value) == bit:
+                            return self.contradiction(n)
+                    elif mask & bit:
+                        mask ^= bit
+                        neighbour.set_domain_mask(mask)
+                        self.arc_revisions += 1
+                        if mask == 0:
+                            return self.contradiction(n)
+                        if is_singleton(mask):
+                            # like Field.remove_from_domain, a field left with one value is set to it
+                            neighbour.set_value(bit_to_value(mask))
+                            singles.append(n)
+                            undecided -= 1
+
+            push = self.worklist.push
+            cell_in_arcs = self.topology.cell_in_arcs
+            for cell in singles:
+                for arc in cell_in_arcs[cell]:
+                    push(arc)
+            self.solved_by_givens = undecided == 0
+            return True
+
+    def contradiction(self, cell) -> bool:
+        """Reports a wipeout at the field of the given index, see run_worklist, and returns False"""
+        self.wipeouts += 1
+        self.instrumentation.emit("wipeout", cell)
+        if not self.benchmark_mode:
+            print("unsolveable sudoku detected, last state is as follows:")
+            self.show_sudoku()
+        return False
 
     def revise(self, arc):
         """
@@ -104,244 +234,324 @@ class Game:
         Removes values from the domain of the first field that do not satisfy the constraint.
         The constraint is that the values of two fields in an arc cannot be the same.
         
-        :param arc: A tuple of two Fields, (field1, field2), where field1 is being revised.
+        :param arc: id of the arc (field1, field2) in the topology, where field1 is being revised.
         :return: True if the domain of the first field was revised, False otherwise.
         """
-        revised = False
-        domain_of_first = arc[0].get_domain().copy() 
-        domain_of_second = arc[1].get_domain()
-
-        #if the domain of second is empty, this means the field was already set in the first place.
-        if len(domain_of_second) == 0:
-            second_value = arc[1].get_value()
-            for value in domain_of_first:
-            # If the value of the first field is equal to the fixed value of the second field,
-            # remove it from the first field's domain (constraint violation)
-                if value == second_value:
-                    arc[0].remove_from_domain(value)
-                    revised = True
-                    self.arc_revisions += 1
-            return revised
-        
-        for value_1 in domain_of_first:
-            diff_value = False
-            # Check if there is any value in the second domain that satisfies the constraint
-            #if a different value is found in the second domain, this satisfies the constraint
-            for value_2 in domain_of_second:
-                if (value_1 != value_2):
-                    diff_value = True
-                    break
-            if not diff_value:
-                arc[0].remove_from_domain(value_1)
-                revised = True
-                self.arc_revisions += 1 
-
-        return revised
+        first = self.cells[self.topology.arc_src[arc]]
+        second = self.cells[self.topology.arc_dst[arc]]
+        domain_of_second = second.get_domain_mask()
+
+        # if the domain of second is empty, this means the field was already set in the first place.
+        if domain_of_second == 0:
+            conflicting = value_to_bit(second.get_value())
+        # A value of the first field only loses all support if the second field has exactly that one value left.
+        # With more than one value in the second domain, there is always a different value to satisfy the constraint.
+        elif is_singleton(domain_of_second):
+            conflicting = domain_of_second
+        else:
+            return False
+
+        if first.get_domain_mask() & conflicting:
+            first.remove_from_domain(bit_to_value(conflicting))
+            self.arc_revisions += 1
+            return True
+        return False
 
     def put_neighbours_in_queue(self, arc):
         """
-        Function puts all neighbours of a field into the arc_queue as the tuple (neighbour, field)
+        Function puts all neighbours of a field into the worklist as the arc (neighbour, field)
+        The ids of these arcs are precomputed in topology.arc_requeue, so no arc or neighbour list is built here.
         We need to put back a arc back in the queue even if it may already be present, because after a revision, because:
 
         The reason is that even if an arc is already in the queue, a revision of the domain can potentially make it necessary to revise the same arc again. 
         For example, reducing the domain of a neighboring variable might require rechecking all arcs involving that variable, 
         even if those arcs are already in the queue.
         If you skip adding an arc back, you risk missing necessary domain reductions, leading to an incomplete or incorrect arc consistency check.
+
+        That is only true for arcs that have already been popped though. An arc that is still waiting in the queue will be revised
+        against the domains as they are when it is popped, which already include this revision, so pushing it a second time only
+        makes revise run twice on the same arc. With dedup_queue, such duplicates are skipped and AC-3 reaches the same fixpoint.
         """
-        neighbours = arc[0].get_other_neighbours(arc[1])
-        for n in neighbours:
-            n_arc = (n, arc[0])
-            if self.h_type == -1: # no heuristic requested
-                self.arc_queue.put(n_arc)
-            else:
-                priority = self.heuristic_picker(n_arc)
-                heapq.heappush(self.arc_pqueue, (priority, n_arc))
+        push = self.worklist.push
+        for n_arc in self.topology.arc_requeue[arc]:
+            push(n_arc)
 
     def AC_3(self) -> bool:
         """
         Implementation of the AC-3 algorithm
         @return: true if the constraints can be satisfied, false otherwise
         """
-        self.init_queue()
-
-        while True:
-            current_arc = ()
-            if self.h_type == -1: #no heuristic requested
-                if self.arc_queue.empty():
-                    break
-                current_arc = self.arc_queue.get()
-            else: #some heuristic requested
-                if not self.arc_pqueue:
-                    break
-                #we dont need priority anymore
-                _, current_arc = heapq.heappop(self.arc_pqueue)
+        with self.instrumentation.span("AC_3"):
+            if self.init_mode == INIT_GIVENS:
+                if not self.init_from_givens():
+                    return False
+            else:
+                self.init_queue()
+            if not self.run_worklist():
+                # two of the singles set from the givens clashed
+                self.solved_by_givens = False
+                return False
+            if self.solved_by_givens:
+                self.instrumentation.emit("solved_by_givens", self)
+            return True
 
+    def run_worklist(self) -> bool:
+        """
+        The main loop of AC-3: revises arcs until the worklist is empty.
+        Separate from AC_3 so that propagation can continue from arcs pushed after AC-3 finished, see restrict_domain.
+        @return: true if the constraints can be satisfied, false otherwise
+        """
+        worklist = self.worklist
+        while worklist:
+            current_arc = worklist.pop()
             if self.revise(current_arc):
-                if current_arc[0].get_domain_size() == 0:
-                    if not self.benchmark_mode:
-                        print("unsolveable sudoku detected, last state is as follows:")
-                        self.show_sudoku()
-                    return False #no solution is possible
+                revised_cell = self.topology.arc_src[current_arc]
+                if worklist.live_priorities:
+                    # every arc touching the revised field depends on its domain size
+                    worklist.reprioritise(self.topology.cell_arcs[revised_cell])
+                    worklist.reprioritise(self.topology.cell_in_arcs[revised_cell])
+                if self.cells[revised_cell].get_domain_size() == 0:
+                    return self.contradiction(revised_cell) #no solution is possible
                 self.put_neighbours_in_queue(current_arc)
 
         return True #freedom!
 
+    def restrict_domain(self, cell, keep_mask):
+        """
+        Narrows the domain of an unset field to the values in keep_mask, used by the propagation rules.
+        If a single value is left, the field is set to it and the arcs towards it are pushed, so that
+        run_worklist propagates it to its neighbours like AC-3 would have.
+        :param cell: index of the field
+        :param keep_mask: the values the field may keep
+        :return: False if the domain became empty, True otherwise
+        """
+        field = self.cells[cell]
+        mask = field.get_domain_mask() & keep_mask
+        field.set_domain_mask(mask)
+        if mask == 0:
+            return False
+        if self.worklist.live_priorities:
+            self.worklist.reprioritise(self.topology.cell_arcs[cell])
+            self.worklist.reprioritise(self.topology.cell_in_arcs[cell])
+        if is_singleton(mask):
+            field.set_value(bit_to_value(mask))
+            push = self.worklist.push
+            for arc in self.topology.cell_in_arcs[cell]:
+                push(arc)
+        return True
+
     #functions for backtracking search:
 
     def pick_unset_field(self):
         """Function to pick an unset field for the next field to assign a value to.
         Uses MRV to select the most constrained field.
         Degree heuristic was tried, but proved to slow down the overall solving, and thus MRV is the only heuristic used.
+        It is still available as a tie break policy, see Buckets.py
+        During a search the unset fields are kept in buckets by domain size, so no scan is needed.
+        Returns None if every field is set.
         """
+        if self.buckets is not None:
+            cell = self.buckets.pick()
+            return None if cell == -1 else self.cells[cell]
+
         len_of_most_constrained = float('inf')  # Initialize to a high value
+        most_constrained_field = None
 
-        for i in range(9):
-            for j in range(9):
-                field = self.sudoku.board[i][j]
-                domain_size = field.get_domain_size()
+        for field in self.cells:
+            domain_size = field.get_domain_size()
 
-                # Find the most constrained field
-                if domain_size < len_of_most_constrained and field.get_value() == 0:
-                    len_of_most_constrained = domain_size
-                    most_constrained_field = field
+            # Find the most constrained field
+            if domain_size < len_of_most_constrained and field.get_value() == 0:
+                len_of_most_constrained = domain_size
+                most_constrained_field = field
 
         return most_constrained_field
 
+    def set_fields_consistent(self):
+        """
+        Checks that no two set fields (e.g. givens) share a value within a row, column or block.
+        AC-3 can't tell: a set field has an empty domain, so revising an arc between two set fields never removes anything.
+        """
+        for field in self.cells:
+            if field.get_value() != 0 and not self.check_neighbours(field):
+                return False
+        return True
+
     def check_neighbours(self, field):
         """function to check the neighbours of a given field to see if it doesn't violate constraints
         returns true is no constraint is violated, false otherwise
         """
-        for n in field.get_neighbours():
-            if field.get_value() == n.get_value():
+        cells = self.cells
+        for n in self.topology.peers[field.get_index()]:
+            if field.get_value() == cells[n].get_value():
                 return False #big no no !
         return True
     
-    def forward_check(self, field, value, changes):
+    def forward_check(self, field, value):
         """function applies a forward checking heuristic to the backtracker.
         for all the neighbours of the given "field", we remove the value that was assigned to it from their domains. The value is in parameter "value".
-        all the changes to domains are remembered in list "changes" which is a tuple (field, <value removed from domain>)
+        the old domain of every changed neighbour is saved on the trail, so the caller can roll back with undo_changes(mark)
         if, as the result of the domain reduction, a domain is size 0, then this assignment "value" to "field" must be incorrect, therefore a dead end.
-            in this case, the "value" is removed from "field" and a function to restore domains using list "changes" is called.
+            in this case, the "value" is removed from "field" and the changes made by this call are undone.
             finally, we return False in this case.
         if not, we return true.
         """
-        for n in field.get_neighbours():
-            len_of_n_domain_before = n.get_domain_size()
-            if value in n.get_domain():
-                n.remove_from_domain_no_assign(value)
-                changes.append((n, value))
-            #It is only a const. violation if the RESULT of the reduction reduces the domain to 0. 
-            if n.get_domain_size() == 0 and len_of_n_domain_before != 0:
-                self.undo_changes(changes)
-                field.remove_value()
-                return False
+        bit = value_to_bit(value)
+        cells = self.cells
+        trail = self.trail
+        buckets = self.buckets
+        mark = trail.mark()
+        for n_index in self.topology.peers[field.get_index()]:
+            n = cells[n_index]
+            mask = n.get_domain_mask()
+            if mask & bit:
+                trail.save(n_index, mask)
+                n.set_domain_mask(mask ^ bit)
+                if buckets is not None:
+                    buckets.resize(n_index, mask ^ bit)
+                #It is only a const. violation if the RESULT of the reduction reduces the domain to 0. 
+                if mask == bit:
+                    self.wipeouts += 1
+                    self.instrumentation.emit("wipeout", n_index)
+                    self.undo_changes(mark)
+                    field.remove_value()
+                    return False
         return True
 
-    def undo_changes(self, changes):
-        """simply loops over the list and restores "value" to the domain of "curr_field" """
-        for curr_field, value in changes:
-            curr_field.add_to_domain(value) 
+    def undo_changes(self, mark):
+        """restores every domain saved on the trail since "mark" was taken, see Trail.undo"""
+        self.trail.undo(mark)
     
-    def backtracker(self):
+    def backtracker(self, max_nodes=None, timeout=None):
         """
         Solves the Sudoku board using backtracking search with forward checking 
         to reduce domains and enforce constraints.
+        The search itself is iterative, see Search.py, and is kept in self.search so it can be resumed.
 
         Steps:
-        1. If the board is fully solved, fills in the
-        board values with `fill_board()` and terminates successfully.
+        1. If every field has a value, terminates successfully.
         2. else, Selects the next unset field using `pick_unset_field()`.
         3. Iterates over possible values in the field's domain:
         - Tentatively assigns a value to the field.
         - Validates the assignment against neighboring fields with `check_neighbours()`.
         - Applies `forward_check()` to reduce domains of neighboring fields,
-            recording any changes in list `changes` for rollback.
-        - Recursively continues the search if forward checking succeeds.
+            saving the old domains on the trail for rollback, from the trail mark of the decision level.
+        - Continues the search one level deeper if forward checking succeeds.
         4. If the assignment leads to a dead end, calls `undo_changes()` to rollback
-        domain reductions and proceeds with the next value.
+        domain reductions and proceeds with the next value. Once all values failed, the field is unset again.
 
+        :param max_nodes: give up after trying this many assignments, None for no limit
+        :param timeout: give up after this many seconds, None for no limit
         Returns:
             True if the board is successfully solved, False otherwise.
+            If the search gave up, self.search.status is PAUSED and calling backtracker again resumes it.
         """
-        if self.is_solved():
-            self.fill_board()
-            return True
-        
-        curr_field = self.pick_unset_field()
-
-        for v in curr_field.get_domain():
-            curr_field.set_value(v)
-            if self.check_neighbours(curr_field):
-                changes = []
-                if self.forward_check(curr_field, v, changes):
-                    if self.backtracker():
-                        return True
-                
-                self.undo_changes(changes)
-
-        return False
+        if self.search is None or self.search.status == EXHAUSTED:
+            self.search = Search(self)
+        with self.instrumentation.span("backtracker"):
+            return self.search.run(max_nodes, timeout) == SOLVED
     
     def is_solved(self):
         """function checks if the sudoku board is "filled" or not.
-        a board is "filled" iff all fields have a domain smaller than 1, including.
-        this is because the backtracker doesn't assign values to fields as soon as their domain reaches zero. 
+        a board is "filled" iff all fields have a value. Fields whose domain went down to a single value during the search
+        are assigned by the search like any other field, the forward check makes sure that value is still consistent.
         """
-        for i in range(0, 9):
-            for j in range(0,9):
-                if self.sudoku.board[i][j].get_domain_size() > 1:
-                    return False
+        if self.buckets is not None:
+            return self.buckets.unset == 0
+        for field in self.cells:
+            if field.get_value() == 0:
+                return False
         return True
-    
-    def fill_board(self):
-        """function simply loops over the board and assigns for fields which have a domain of 1 the value in their domain"""
-        for i in range(0, 9):
-            for j in range(0,9):
-                if self.sudoku.board[i][j].get_domain_size() == 1:
-                    self.sudoku.board[i][j].set_value(self.sudoku.board[i][j].get_domain()[0])
 
-    
+    def track_unset_fields(self):
+        """Starts keeping the unset fields in buckets by domain size, forward checking and the trail keep them up to date"""
+        self.buckets = DomainBuckets(self.cells, self.topology.peers, self.tie_break, self.topology.size)
+        self.trail.buckets = self.buckets
+
     #solver and verifier:
     
-    def full_solver(self):
+    def full_solver(self, propagation_level=0):
         """A full solver function that does backtracking after AC-3, if necessary.
         Even though the backtracker is called everytime regardless of the success of AC-3, the function immediately terminates if the
         state of the sudoku is filled.
+        :param propagation_level: 0 for AC-3 only, 1 to 3 for stronger propagation before the search, see propagate
         """
-        return self.AC_3() and self.backtracker()
+        solved = self.propagate(propagation_level) and self.backtracker()
+        self.instrumentation.record(self)
+        return solved
+
+    def propagate(self, level=0) -> bool:
+        """
+        Runs AC-3 and, depending on the level, the unit based rules of Propagation.py on top of it.
+        0: AC-3 only
+        1: + hidden singles
+        2: + naked and hidden pairs, pointing and claiming
+        3: + naked and hidden triples
+        Every rule counts its firings in rule_firings, like AC-3 does in arc_revisions.
+        @return: False if the sudoku was found to be unsolvable, True otherwise
+        """
+        if level == 0:
+            return self.AC_3()
+        return propagate(self, rules_for_level(level))
     
 
+    def count_solutions(self, limit=2, propagation_level=0):
+        """
+        Counts the solutions of the sudoku, stopping as soon as limit solutions are found.
+        Propagation never removes a solution, so it runs once up front. After that, a single search keeps going
+        after every solution it finds, instead of starting over, see Search.
+        The solutions are kept in self.solutions, the board itself is left in its propagated state.
+        :param limit: stop after this many solutions
+        :param propagation_level: see propagate
+        :return: number of solutions found, at most limit
+        """
+        self.solutions = []
+        if not self.set_fields_consistent() or not self.propagate(propagation_level):
+            return 0
+        self.search = Search(self)
+        while len(self.solutions) < limit and self.search.run() == SOLVED:
+            self.solutions.append(self.sudoku.to_string())
+        self.search.unwind()
+        return len(self.solutions)
+
+    def has_unique_solution(self, propagation_level=0) -> bool:
+        """True iff the sudoku has exactly one solution, the search stops at the second one"""
+        return self.count_solutions(2, propagation_level) == 1
+
     def valid_solution(self) -> bool:
         """
         Checks the validity of a sudoku solution.
         A valid solution satisfies:
-        - Each row contains unique numbers from 1 to 9.
-        - Each column contains unique numbers from 1 to 9.
-        - Each 3x3 block contains unique numbers from 1 to 9.
+        - Each row contains unique numbers from 1 to size (9 on a regular board).
+        - Each column contains unique numbers from 1 to size.
+        - Each block (3x3 on a regular board) contains unique numbers from 1 to size.
         @return: True if the sudoku solution is correct, False otherwise
         """
+        size = self.topology.size
+        box = self.topology.box_size
         # Check rows
-        for i in range(9):
+        for i in range(size):
             if not self.check_and_report(
-                (self.sudoku.board[i][j].get_value() for j in range(9)),
+                (self.sudoku.board[i][j].get_value() for j in range(size)),
                 f"row {i+1}"
             ):
                 return False
 
         # Check columns
-        for i in range(9):
+        for i in range(size):
             if not self.check_and_report(
-                (self.sudoku.board[j][i].get_value() for j in range(9)),
+                (self.sudoku.board[j][i].get_value() for j in range(size)),
                 f"column {i+1}"
             ):
                 return False
 
-        # Check 3x3 subgrids
-        for row_block in range(0, 9, 3):
-            for col_block in range(0, 9, 3):
+        # Check blocks
+        for row_block in range(0, size, box):
+            for col_block in range(0, size, box):
                 if not self.check_and_report(
                     (self.sudoku.board[row_block + i][col_block + j].get_value()
-                    for i in range(3) for j in range(3)),
-                    f"3x3 block starting at ({row_block+1},{col_block+1})"
+                    for i in range(box) for j in range(box)),
+                    f"{box}x{box} block starting at ({row_block+1},{col_block+1})"
                 ):
                     return False
 
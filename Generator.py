@@ -0,0 +1,185 @@
+"""
+Puzzle generator built on the solvers.
+
+A puzzle is made in three steps:
+1. a complete grid is filled by the backtracking search of Game, trying the values of every field in random order
+2. clues are removed one at a time, in random order, as long as the puzzle keeps a unique solution (checked with DLX)
+3. the puzzle is graded by the weakest propagation level that solves it without search, see Game.propagate,
+   or as extreme, with the number of search nodes needed, if none does
+
+Every random choice comes from one random.Random seeded per puzzle, so a puzzle only depends on its seed:
+the same seed (and options) always gives the same puzzle, whatever the number of worker processes.
+"""
+import random
+import time
+from BatchSolver import run_tasks
+from DLX import DLXGame
+from Game import Game
+from Search import Search
+from Sudoku import Sudoku
+
+# grade names by propagation level needed, the last one needs a search
+GRADES = ("easy", "medium", "hard", "expert", "extreme")
+
+default_min_clues = 17  # no 9x9 sudoku with fewer clues has a unique solution
+default_chunksize = 8  # puzzles per task sent to a worker, generating one takes far longer than sending it
+fill_node_budget = 10000  # nodes before a grid fill restarts from scratch, an unlucky value order can thrash
+
+
+class GeneratedPuzzle:
+    """
+    One generated puzzle.
+    seed: the seed it was generated from, see generate
+    puzzle: the puzzle as an 81 character string, '0' for unset fields
+    solution: its unique solution as an 81 character string
+    clues: number of set fields in the puzzle
+    level: propagation level that solves it without search, see Game.propagate, len(GRADES) - 1 if a search is needed
+    grade: name of the level, see GRADES
+    nodes: search nodes needed after propagating at the highest level, 0 unless the grade is extreme
+    wall_time: seconds spent generating and grading the puzzle
+    """
+
+    def __init__(self, seed, puzzle, solution, level, nodes, wall_time):
+        self.seed = seed
+        self.puzzle = puzzle
+        self.solution = solution
+        self.clues = sum(1 for c in puzzle if c != "0")
+        self.level = level
+        self.grade = GRADES[level]
+        self.nodes = nodes
+        self.wall_time = wall_time
+
+    def __repr__(self):
+        return (f"GeneratedPuzzle(seed={self.seed}, clues={self.clues}, grade={self.grade}, "
+                f"nodes={self.nodes}, wall_time={self.wall_time:.6f})")
+
+
+def random_grid(rng):
+    """
+    Fills an empty board with the backtracking search, trying the values of every field in random order
+    :param rng: random.Random
+    :return: the complete grid as an 81 character string
+    """
+    while True:
+        game = Game(Sudoku(puzzle="0" * 81), -1, True)
+        game.search = Search(game, rng)
+        if game.backtracker(max_nodes=fill_node_budget):
+            return game.sudoku.to_string()
+
+
+def remove_clues(solution, rng, min_clues=default_min_clues, symmetric=False):
+    """
+    Blanks the fields of a complete grid in random order, keeping every removal after which the puzzle
+    still has a unique solution
+    :param solution: complete grid as an 81 character string
+    :param rng: random.Random
+    :param min_clues: stop removing once the puzzle is down to this many clues
+    :param symmetric: remove fields in pairs symmetric around the centre, as in most published puzzles
+    :return: the puzzle as an 81 character string
+    """
+    puzzle = list(solution)
+    clues = len(puzzle)
+    cells = list(range(len(puzzle)))
+    rng.shuffle(cells)
+    for cell in cells:
+        group = {cell, len(puzzle) - 1 - cell} if symmetric else {cell}
+        if puzzle[cell] == "0" or clues - len(group) < min_clues:
+            continue
+        for i in group:
+            puzzle[i] = "0"
+        # straight to the exact cover search, AC-3 first would cost more than the search it saves
+        if DLXGame(Sudoku(puzzle="".join(puzzle)), -1, True).count_solutions(2) == 1:
+            clues -= len(group)
+        else:
+            for i in group:
+                puzzle[i] = solution[i]
+    return "".join(puzzle)
+
+
+def grade(puzzle):
+    """
+    Grades a puzzle by the propagation needed to solve it
+    :param puzzle: 81 character puzzle string with a unique solution
+    :return: (level, nodes): the lowest propagation level solving the puzzle without search, or len(GRADES) - 1
+        if none does, and the number of search nodes needed after propagating at the highest level
+    """
+    game = Game(Sudoku(puzzle=puzzle), -1, True)
+    for level in range(len(GRADES) - 1):
+        # each level starts from the domains the previous one left, so no work is repeated
+        if not game.propagate(level):
+            raise ValueError("The puzzle has no solution")
+        if game.is_solved():
+            return level, 0
+    if not game.backtracker():
+        raise ValueError("The puzzle has no solution")
+    return len(GRADES) - 1, game.nodes
+
+
+def generate(seed, min_clues=default_min_clues, symmetric=False) -> GeneratedPuzzle:
+    """
+    Generates and grades one puzzle, in the current process
+    :param seed: any value random.Random accepts, the puzzle only depends on it and on the options
+    :param min_clues: see remove_clues
+    :param symmetric: see remove_clues
+    """
+    start = time.perf_counter()
+    rng = random.Random(seed)
+    solution = random_grid(rng)
+    puzzle = remove_clues(solution, rng, min_clues, symmetric)
+    level, nodes = grade(puzzle)
+    return GeneratedPuzzle(seed, puzzle, solution, level, nodes, time.perf_counter() - start)
+
+
+def item_seed(seed, index):
+    """The seed of the index-th puzzle of a batch generated from seed, independent of how the batch is split up"""
+    return random.Random(f"{seed}/{index}").getrandbits(64)
+
+
+def _generate_chunk(seeds, min_clues, symmetric):
+    """Worker side of generate_batch, generates the puzzles of a chunk of seeds"""
+    return [generate(seed, min_clues, symmetric) for seed in seeds]
+
+
+def generate_batch(count, seed=0, max_workers=None, chunksize=default_chunksize, min_clues=default_min_clues,
+                   symmetric=False):
+    """
+    Generates many puzzles over a pool of worker processes, with a bounded number of chunks in flight,
+    scheduled by BatchSolver.run_tasks like the batches of solve_batch.
+    The index-th puzzle is generated from item_seed(seed, index), so a batch is reproducible from its seed
+    and any puzzle of it can be regenerated on its own with generate.
+
+    :param count: number of puzzles
+    :param seed: seed of the whole batch
+    :param max_workers: number of worker processes, defaults to the number of CPUs
+    :param chunksize: number of puzzles per task sent to a worker
+    :return: generator of GeneratedPuzzle, in index order
+    """
+    seeds = (item_seed(seed, index) for index in range(count))
+    chunks = iter(lambda: [s for _, s in zip(range(chunksize), seeds)], [])
+    return run_tasks(((_generate_chunk, chunk, min_clues, symmetric) for chunk in chunks), max_workers, ordered=True)
+
+
+if __name__ == "__main__":
+    import argparse
+    import csv
+    import sys
+
+    parser = argparse.ArgumentParser(description="Generate graded puzzles, one 81 character puzzle per line.")
+    parser.add_argument("count", type=int, help="number of puzzles")
+    parser.add_argument("--seed", default="0", help="seed of the batch, the same seed gives the same puzzles")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=default_chunksize)
+    parser.add_argument("--min-clues", type=int, default=default_min_clues)
+    parser.add_argument("--symmetric", action="store_true", help="remove clues in symmetric pairs")
+    parser.add_argument("--csv", action="store_true", help="write the seed, grade and solution of every puzzle as well")
+    args = parser.parse_args()
+
+    puzzles = generate_batch(args.count, args.seed, args.workers, args.chunksize, args.min_clues, args.symmetric)
+    if args.csv:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(["Seed", "Puzzle", "Clues", "Grade", "Level", "Nodes", "Wall_Time", "Solution"])
+        for p in puzzles:
+            writer.writerow([p.seed, p.puzzle, p.clues, p.grade, p.level, p.nodes, f"{p.wall_time:.6f}", p.solution])
+    else:
+        for p in puzzles:
+            print(p.puzzle)
@@ -0,0 +1,144 @@
+"""
+Instrumentation of the solvers: named counters, timing spans and event callbacks.
+
+The hot loops of AC-3 and of the search already keep plain integer counters (Game.arc_revisions, the worklist pops,
+Search.nodes, ...). Instrumentation never adds work to those loops: record(game) adds the counters of a finished solve
+to its totals, so one Instrumentation can aggregate every puzzle solved by a worker process.
+Spans time whole phases (init_queue, AC_3, backtracker) and events are only emitted when callbacks subscribed to them.
+
+A Game without instrumentation uses NULL_INSTRUMENTATION, whose methods do nothing, and the search skips emitting
+events altogether when instrumentation.enabled is False.
+
+Events and their arguments:
+assign(cell, value, depth): the search tries value for the field at index cell, at decision level depth (from 1)
+backtrack(cell, depth): every candidate of the field at index cell failed, the search leaves that level
+wipeout(cell): the domain of the field at index cell became empty, in AC-3 or in a forward check
+solved(game): the search found a solution
+solved_by_givens(game): AC-3 started from the givens found they decide every field, no search is needed
+"""
+import time
+
+# counters of Game.counters, recorded by Instrumentation.record
+COUNTERS = ("arcs_popped", "revisions", "wipeouts", "nodes", "backtracks", "max_depth")
+
+
+class _NullSpan:
+    """Context manager doing nothing, shared by every span of a disabled instrumentation"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Span:
+    """Times its with block into the spans of an Instrumentation"""
+
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter_ns() - self.start
+        spans = self.instrumentation.spans
+        count, total = spans.get(self.name, (0, 0))
+        spans[self.name] = (count + 1, total + elapsed)
+        return False
+
+
+class Instrumentation:
+    """
+    Collects counters, span timings and dispatches events.
+    Fields:
+    counters: totals by counter name, see COUNTERS. Maxima (max_depth) keep the largest value recorded instead of a sum
+    spans: (number of times entered, total nanoseconds) by span name
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.counters = {name: 0 for name in COUNTERS}
+        self.spans = {}
+        self.subscribers = {}
+
+    def count(self, name, amount=1):
+        """Adds amount to a named counter, creating it if needed"""
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def maximum(self, name, value):
+        """Keeps the largest value seen for a named counter"""
+        if value > self.counters.get(name, 0):
+            self.counters[name] = value
+
+    def record(self, game):
+        """Adds the counters of a game to the totals, see Game.counters"""
+        for name, value in game.counters().items():
+            if name == "max_depth":
+                self.maximum(name, value)
+            else:
+                self.count(name, value)
+
+    def span(self, name):
+        """
+        Times a phase:
+            with instrumentation.span("AC_3"):
+                ...
+        """
+        return _Span(self, name)
+
+    def subscribe(self, event, callback):
+        """Calls callback with the arguments of the event every time it is emitted, see the module docstring"""
+        self.subscribers.setdefault(event, []).append(callback)
+
+    def unsubscribe(self, event, callback):
+        self.subscribers.get(event, []).remove(callback)
+
+    def emit(self, event, *args):
+        for callback in self.subscribers.get(event, ()):
+            callback(*args)
+
+    def snapshot(self):
+        """The counters and spans (count and total milliseconds) as a dict of plain values, e.g. to export as JSON"""
+        return {
+            "counters": dict(self.counters),
+            "spans": {name: {"count": count, "total_ms": total / 1e6} for name, (count, total) in self.spans.items()},
+        }
+
+    def reset(self):
+        """Clears the counters and spans, the subscriptions stay"""
+        self.counters = {name: 0 for name in COUNTERS}
+        self.spans = {}
+
+
+class NullInstrumentation(Instrumentation):
+    """Instrumentation that records nothing, used when none is given"""
+
+    enabled = False
+    _null_span = _NullSpan()
+
+    def count(self, name, amount=1):
+        pass
+
+    def maximum(self, name, value):
+        pass
+
+    def record(self, game):
+        pass
+
+    def span(self, name):
+        return self._null_span
+
+    def subscribe(self, event, callback):
+        raise ValueError("Can't subscribe to disabled instrumentation, give the Game an Instrumentation")
+
+    def emit(self, event, *args):
+        pass
+
+
+NULL_INSTRUMENTATION = NullInstrumentation()
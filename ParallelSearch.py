@@ -0,0 +1,221 @@
+"""
+Parallel search of a single puzzle over worker processes, for the hard puzzles that set the worst case latency.
+
+The first decision levels of the search are expanded up front, in the calling process: AC-3 runs on the board, the field
+with the fewest values left is picked like Game.pick_unset_field does, and the board is split into one subproblem per
+value of that field, the field being set to it. Subproblems are split again, level by level, until there are
+tasks_per_worker of them for every worker. AC-3 never removes a solution and the values of a field exclude each other,
+so the subproblems split the solutions of the puzzle between them without overlap.
+
+Every subproblem is a snapshot of its board (see Sudoku.snapshot), a few hundred bytes to send. The pool hands them out
+one at a time from a single queue, so a worker done with an easy subtree takes the next one while another worker is still
+deep in a hard one: with many more subproblems than workers, this balances the load like work stealing would, without
+sharing any search state between processes.
+
+Workers search in slices of slice_nodes nodes (see Search.run) and check a shared multiprocessing Event between slices.
+Solving sets it as soon as one worker finds a solution, counting once the limit is reached, and every other worker stops
+within one slice. Subproblems not started yet are cancelled.
+"""
+import heapq
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from Game import Game, INIT_GIVENS
+from Search import Search, SOLVED, EXHAUSTED
+from Sudoku import Sudoku
+
+default_tasks_per_worker = 8  # subproblems per worker, more of them balance uneven subtrees better
+default_slice_nodes = 2000  # nodes searched between two checks of the cancellation event
+
+# set in every worker by _init_worker, the event shared with the process that split the puzzle
+_cancel = None
+
+
+class ParallelResult:
+    """
+    Outcome of a parallel search.
+    solutions: the solutions found, as puzzle strings (see Sudoku.to_string), at most one when solving
+    count: number of solutions found, at most the limit when counting
+    subproblems: number of subproblems the puzzle was split into
+    nodes: search nodes over all workers, the nodes of subproblems cancelled while running included
+    split_time: seconds spent splitting the puzzle
+    wall_time: seconds spent in total
+    """
+
+    def __init__(self, solutions, subproblems, nodes, split_time, wall_time):
+        self.solutions = solutions
+        self.count = len(solutions)
+        self.subproblems = subproblems
+        self.nodes = nodes
+        self.split_time = split_time
+        self.wall_time = wall_time
+
+    @property
+    def solution(self):
+        """The first solution found, None if there is none"""
+        return self.solutions[0] if self.solutions else None
+
+    def __repr__(self):
+        return (f"ParallelResult(count={self.count}, subproblems={self.subproblems}, nodes={self.nodes}, "
+                f"wall_time={self.wall_time:.6f})")
+
+
+def _propagated(sudoku, h_type):
+    """
+    Runs AC-3 on the board from the set fields, see Game.init_from_givens
+    :return: the Game, None if the board has no solution
+    """
+    game = Game(sudoku, h_type, True, init_mode=INIT_GIVENS)
+    return game if game.AC_3() else None
+
+
+def split(sudoku, target, h_type=-1):
+    """
+    Splits a puzzle into subproblems, see the module docstring.
+    Subproblems without any unset field left are never split again, and neither are subproblems found unsolvable by AC-3,
+    which are dropped.
+    :param sudoku: the puzzle, its board is left in the state it was given in
+    :param target: number of subproblems to reach, if the board allows that many
+    :return: list of snapshots, one per subproblem
+    """
+    unsolved = sudoku.snapshot()
+    box_size = sudoku.topology.box_size
+    board = Sudoku(snapshot=unsolved, box_size=box_size)
+    # (decision level, domain size of the field to split on, order added, cell, snapshot): level by level,
+    # and within a level the smallest domains first, they add the fewest subproblems
+    frontier = []
+    done = []
+
+    def add(snapshot, level):
+        board.restore(snapshot)
+        game = _propagated(board, h_type)
+        if game is None:
+            return
+        field = game.pick_unset_field()
+        if field is None:
+            done.append(board.snapshot())
+        else:
+            heapq.heappush(frontier, (level, field.get_domain_size(), len(done) + len(frontier), field.get_index(),
+                                      board.snapshot()))
+
+    add(unsolved, 0)
+    while frontier and len(frontier) + len(done) < target:
+        level, _, _, cell, snapshot = heapq.heappop(frontier)
+        board.restore(snapshot)
+        field = board.cells[cell]
+        for value in field.get_domain():
+            board.restore(snapshot)
+            # set like a given, AC-3 of the subproblem propagates it
+            field.set_value(value)
+            field.set_domain_mask(0)
+            add(board.snapshot(), level + 1)
+    return done + [entry[-1] for entry in frontier]
+
+
+def _init_worker(cancel):
+    global _cancel
+    _cancel = cancel
+
+
+def _search_subproblem(snapshot, box_size, limit, h_type, slice_nodes):
+    """
+    Worker side: searches one subproblem in slices, until limit solutions are found, the subtree is exhausted,
+    or another worker set the cancellation event
+    :return: (solutions as puzzle strings, search nodes)
+    """
+    if _cancel is not None and _cancel.is_set():
+        return [], 0
+    sudoku = Sudoku(snapshot=snapshot, box_size=box_size)
+    game = _propagated(sudoku, h_type)
+    if game is None:
+        return [], 0
+    search = game.search = Search(game)
+    solutions = []
+    while not (_cancel is not None and _cancel.is_set()):
+        status = search.run(slice_nodes)
+        if status == SOLVED:
+            solutions.append(sudoku.to_string())
+            if len(solutions) >= limit:
+                break
+        elif status == EXHAUSTED:
+            break
+    return solutions, search.nodes
+
+
+def _search(sudoku, limit, max_workers, tasks_per_worker, h_type, slice_nodes):
+    """Splits the puzzle and searches the subproblems until limit solutions are found, see parallel_solve"""
+    start = time.perf_counter()
+    max_workers = max_workers or os.cpu_count() or 1
+    if isinstance(sudoku, str):
+        sudoku = Sudoku(puzzle=sudoku)
+    subproblems = split(sudoku, max_workers * tasks_per_worker, h_type)
+    split_time = time.perf_counter() - start
+
+    solutions = []
+    nodes = 0
+    context = multiprocessing.get_context()
+    cancel = context.Event()
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context,
+                             initializer=_init_worker, initargs=(cancel,)) as executor:
+        pending = {executor.submit(_search_subproblem, snapshot, sudoku.topology.box_size, limit, h_type, slice_nodes)
+                   for snapshot in subproblems}
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                found, subproblem_nodes = future.result()
+                solutions.extend(found)
+                nodes += subproblem_nodes
+            if len(solutions) >= limit and not cancel.is_set():
+                cancel.set()
+                for future in pending:
+                    future.cancel()
+                pending = {future for future in pending if not future.cancelled()}
+    return ParallelResult(solutions[:limit], len(subproblems), nodes, split_time, time.perf_counter() - start)
+
+
+def parallel_solve(sudoku, max_workers=None, tasks_per_worker=default_tasks_per_worker, h_type=-1,
+                   slice_nodes=default_slice_nodes) -> ParallelResult:
+    """
+    Solves one puzzle over a pool of worker processes, see the module docstring. The board itself is not changed.
+    :param sudoku: a Sudoku, or a puzzle string (see Sudoku.parse_puzzle)
+    :param max_workers: number of worker processes, defaults to the number of CPUs
+    :param tasks_per_worker: subproblems to split the puzzle into, per worker
+    :param h_type: heuristic type used by AC-3, see Game
+    :param slice_nodes: search nodes between two checks for cancellation
+    :return: ParallelResult, its solution is None if the puzzle has none
+    """
+    return _search(sudoku, 1, max_workers, tasks_per_worker, h_type, slice_nodes)
+
+
+def parallel_count(sudoku, limit=2, max_workers=None, tasks_per_worker=default_tasks_per_worker, h_type=-1,
+                   slice_nodes=default_slice_nodes) -> ParallelResult:
+    """
+    Counts the solutions of one puzzle over a pool of worker processes, stopping once limit are found,
+    like Game.count_solutions. Same parameters as parallel_solve.
+    :return: ParallelResult, with the count and solutions added up over all subproblems
+    """
+    return _search(sudoku, limit, max_workers, tasks_per_worker, h_type, slice_nodes)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Solve, or count the solutions of, one puzzle over worker processes.")
+    parser.add_argument("puzzle", help="puzzle string, or a sudoku file like the ones of the Sudokus folder")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--tasks-per-worker", type=int, default=default_tasks_per_worker)
+    parser.add_argument("--count", type=int, default=None, metavar="LIMIT",
+                        help="count the solutions, up to LIMIT, instead of solving")
+    parser.add_argument("--heuristic", type=int, default=-1, help="AC-3 heuristic, -1 to 2")
+    args = parser.parse_args()
+
+    board = Sudoku(args.puzzle) if os.path.isfile(args.puzzle) else Sudoku(puzzle=args.puzzle)
+    if args.count is None:
+        result = parallel_solve(board, args.workers, args.tasks_per_worker, args.heuristic)
+        print(result.solution if result.solution else "No solution")
+    else:
+        result = parallel_count(board, args.count, args.workers, args.tasks_per_worker, args.heuristic)
+        print(f"{result.count} solutions" + (" (limit reached)" if result.count >= args.count else ""))
+    print(f"{result.subproblems} subproblems, {result.nodes} nodes, split in {result.split_time * 1000:.1f}ms, "
+          f"{result.wall_time * 1000:.1f}ms in total")
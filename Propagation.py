@@ -0,0 +1,256 @@
+from itertools import combinations
+from Domain import value_to_bit
+
+# possible outcomes of Rule.apply
+NO_CHANGE = 0
+CHANGED = 1
+CONTRADICTION = 2
+
+
+class Rule:
+    """
+    A propagation rule reasoning over whole units (rows, columns, blocks), where AC-3 only looks at pairs of fields.
+    Rules only narrow the domains of unset fields, through Game.restrict_domain, which assigns fields that are down to one
+    value and hands them to AC-3. Every time a rule narrows something counts as one firing in game.rule_firings[name].
+    """
+
+    name = "rule"
+
+    def apply(self, game):
+        """
+        Applies the rule once to every unit of the board
+        :return: NO_CHANGE, CHANGED or CONTRADICTION
+        """
+        raise NotImplementedError
+
+    def fired(self, game):
+        game.rule_firings[self.name] = game.rule_firings.get(self.name, 0) + 1
+
+
+def unit_candidates(game, unit):
+    """
+    Collects the state of a unit.
+    @return: (mask of the values already set in the unit, list of (cell, domain mask) of the unset fields)
+    """
+    cells = game.cells
+    placed = 0
+    unset = []
+    for cell in unit:
+        field = cells[cell]
+        if field.get_value() != 0:
+            placed |= value_to_bit(field.get_value())
+        else:
+            unset.append((cell, field.get_domain_mask()))
+    return placed, unset
+
+
+class HiddenSingles(Rule):
+    """If a value can only go to one field of a unit, that field takes the value."""
+
+    name = "hidden_singles"
+
+    def apply(self, game):
+        full_domain = (1 << game.topology.size) - 1
+        result = NO_CHANGE
+        for unit in game.topology.units:
+            placed, unset = unit_candidates(game, unit)
+            once = 0
+            twice = 0
+            for _, mask in unset:
+                twice |= once & mask
+                once |= mask
+            if full_domain & ~placed & ~once:
+                return CONTRADICTION  # some value has nowhere left to go
+
+            singles = once & ~twice & ~placed
+            while singles:
+                bit = singles & -singles
+                singles ^= bit
+                for cell, mask in unset:
+                    if mask & bit:
+                        if mask != bit:
+                            if not game.restrict_domain(cell, bit):
+                                return CONTRADICTION
+                            self.fired(game)
+                            result = CHANGED
+                        break
+        return result
+
+
+class NakedSubsets(Rule):
+    """If k unset fields of a unit share exactly k values between them, no other field of the unit can take those values."""
+
+    def __init__(self, k):
+        self.k = k
+        self.name = f"naked_subsets_{k}"
+
+    def apply(self, game):
+        result = NO_CHANGE
+        for unit in game.topology.units:
+            _, unset = unit_candidates(game, unit)
+            small = [(cell, mask) for cell, mask in unset if 2 <= mask.bit_count() <= self.k]
+            for subset in combinations(small, self.k):
+                union = 0
+                for _, mask in subset:
+                    union |= mask
+                if union.bit_count() != self.k:
+                    continue
+                members = {cell for cell, _ in subset}
+                removed = False
+                for cell, _ in unset:
+                    if cell not in members and game.cells[cell].get_domain_mask() & union:
+                        if not game.restrict_domain(cell, ~union):
+                            return CONTRADICTION
+                        removed = True
+                if removed:
+                    self.fired(game)
+                    result = CHANGED
+        return result
+
+
+class HiddenSubsets(Rule):
+    """If k values of a unit can only go to the same k fields, those fields cannot take any other value."""
+
+    def __init__(self, k):
+        self.k = k
+        self.name = f"hidden_subsets_{k}"
+
+    def apply(self, game):
+        full_domain = (1 << game.topology.size) - 1
+        result = NO_CHANGE
+        for unit in game.topology.units:
+            placed, unset = unit_candidates(game, unit)
+            # for every missing value, the positions (indices into unset) that can still take it, as a bitmask
+            positions = {}
+            missing = full_domain & ~placed
+            while missing:
+                bit = missing & -missing
+                missing ^= bit
+                where = 0
+                for i, (_, mask) in enumerate(unset):
+                    if mask & bit:
+                        where |= 1 << i
+                positions[bit] = where
+
+            for subset in combinations(positions, self.k):
+                where = 0
+                values = 0
+                for bit in subset:
+                    where |= positions[bit]
+                    values |= bit
+                places = where.bit_count()
+                if places < self.k:
+                    return CONTRADICTION  # k values for fewer than k fields
+                if places != self.k:
+                    continue
+                removed = False
+                for i, (cell, _) in enumerate(unset):
+                    if where >> i & 1 and game.cells[cell].get_domain_mask() & ~values:
+                        if not game.restrict_domain(cell, values):
+                            return CONTRADICTION
+                        removed = True
+                if removed:
+                    self.fired(game)
+                    result = CHANGED
+        return result
+
+
+class PointingClaiming(Rule):
+    """
+    Block/line interactions.
+    Pointing: if a value can only go to one row (column) within a block, it can't go anywhere else in that row (column).
+    Claiming: if a value can only go to one block within a row (column), it can't go anywhere else in that block.
+    """
+
+    name = "pointing_claiming"
+
+    def apply(self, game):
+        topology = game.topology
+        result = NO_CHANGE
+        for box in topology.boxes:
+            for line_of, lines in ((topology.cell_row, topology.rows), (topology.cell_col, topology.cols)):
+                outcome = self.eliminate(game, box, line_of, lines)
+                if outcome == CONTRADICTION:
+                    return CONTRADICTION
+                result = max(result, outcome)
+        for lines in (topology.rows, topology.cols):
+            for line in lines:
+                outcome = self.eliminate(game, line, topology.cell_box, topology.boxes)
+                if outcome == CONTRADICTION:
+                    return CONTRADICTION
+                result = max(result, outcome)
+        return result
+
+    def eliminate(self, game, unit, group_of, groups):
+        """
+        For every value whose candidates within unit all lie in one group (line or block),
+        removes that value from the rest of the group.
+        """
+        placed, unset = unit_candidates(game, unit)
+        result = NO_CHANGE
+        missing = ((1 << game.topology.size) - 1) & ~placed
+        while missing:
+            bit = missing & -missing
+            missing ^= bit
+            group = -1
+            for cell, mask in unset:
+                if mask & bit:
+                    if group == -1:
+                        group = group_of[cell]
+                    elif group != group_of[cell]:
+                        group = -2
+                        break
+            if group < 0:
+                continue  # either no candidate at all (left to hidden singles), or spread over several groups
+            removed = False
+            for cell in groups[group]:
+                field = game.cells[cell]
+                if field.get_value() == 0 and field.get_domain_mask() & bit and cell not in unit:
+                    if not game.restrict_domain(cell, ~bit):
+                        return CONTRADICTION
+                    removed = True
+            if removed:
+                self.fired(game)
+                result = CHANGED
+        return result
+
+
+def rules_for_level(level):
+    """
+    The rules used at a propagation level, cheapest first
+    0: AC-3 only
+    1: + hidden singles
+    2: + naked and hidden pairs, pointing and claiming
+    3: + naked and hidden triples
+    """
+    rules = []
+    if level >= 1:
+        rules.append(HiddenSingles())
+    if level >= 2:
+        rules += [NakedSubsets(2), HiddenSubsets(2), PointingClaiming()]
+    if level >= 3:
+        rules += [NakedSubsets(3), HiddenSubsets(3)]
+    return rules
+
+
+def propagate(game, rules):
+    """
+    Runs AC-3, then the rules until none of them changes anything.
+    After every rule that changed something, AC-3 continues from the fields it set, and the pipeline restarts
+    from the cheapest rule, so the expensive rules only run once the cheap ones are stuck.
+    :param rules: list of Rule, see rules_for_level
+    :return: False if the sudoku was found to be unsolvable, True otherwise
+    """
+    if not game.AC_3():
+        return False
+    while True:
+        for rule in rules:
+            outcome = rule.apply(game)
+            if outcome == CONTRADICTION:
+                return False
+            if outcome == CHANGED:
+                if not game.run_worklist():
+                    return False
+                break
+        else:
+            return True
@@ -0,0 +1,63 @@
+import mmap
+import sys
+from Sudoku import Sudoku
+
+blank_to_zero = str.maketrans(".", "0")
+
+
+def _lines_of(source, use_mmap):
+    """
+    Yields the lines of a source as text, one at a time
+    @param source: path, '-' for stdin, or an already open text/binary file object
+    @param use_mmap: memory-map the file instead of going through buffered reads (paths only)
+    """
+    if source == "-":
+        yield from sys.stdin
+        return
+    if not isinstance(source, str):
+        for line in source:
+            yield line.decode("ascii") if isinstance(line, bytes) else line
+        return
+
+    if use_mmap:
+        with open(source, "rb") as file:
+            # mmap refuses to map an empty file
+            if file.seek(0, 2) == 0:
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for line in iter(mapped.readline, b""):
+                    yield line.decode("ascii")
+        return
+
+    with open(source, "r") as file:
+        yield from file
+
+
+def read_puzzles(source="-", use_mmap=False):
+    """
+    Streams puzzles stored one per line: 81 characters, row by row, with '0' or '.' for unset fields.
+    Anything after the 81st character (e.g. a solution column or a rating) is ignored,
+    as are empty lines and lines starting with '#'.
+    Only one line is held in memory at a time, so corpora of any size can be processed.
+
+    @param source: path, '-' for stdin, or an already open file object
+    @param use_mmap: memory-map the file, recommended for multi-GB corpora
+    @return: generator of 81 character puzzle strings, unset fields normalised to '0'
+    """
+    for line_number, line in enumerate(_lines_of(source, use_mmap), start=1):
+        line = line.strip()
+        if not line or line[0] == "#":
+            continue
+        puzzle = line[:81].translate(blank_to_zero)
+        if len(puzzle) != 81:
+            raise ValueError(f"Line {line_number} is not a puzzle, it has fewer than 81 characters: {line!r}")
+        yield puzzle
+
+
+def read_sudokus(source="-", use_mmap=False):
+    """
+    Like read_puzzles, but builds the Sudoku boards, lazily, one per iteration
+    @return: generator of Sudoku
+    """
+    for puzzle in read_puzzles(source, use_mmap):
+        yield Sudoku(puzzle=puzzle)
@@ -0,0 +1,153 @@
+import time
+from Domain import bit_to_value, value_to_bit, mask_to_values
+
+# possible outcomes of Search.run
+SOLVED = "solved"        # every field has a value, the board holds a solution
+EXHAUSTED = "exhausted"  # the whole search tree was explored, there is no (further) solution
+PAUSED = "paused"        # the node budget or the timeout was hit, calling run again resumes the search
+
+
+class Search:
+    """
+    Iterative depth first search with forward checking over the board of a Game.
+    Instead of recursing once per assignment, every decision level lives on an explicit stack:
+    the index of the field being assigned, the candidates not tried yet (a domain mask) and the trail mark of the level.
+    Because the whole state is in this object and the board, the search can stop after any node and continue later,
+    which allows node budgets, timeouts and running many searches cooperatively.
+
+    After a SOLVED result the stack is kept, so calling run again continues with the next solution.
+
+    Fields:
+    nodes: number of assignments tried so far
+    backtracks: number of decision levels left because all their candidates failed
+    max_depth: largest number of decision levels open at once
+    status: outcome of the last run, None before the first one
+    rng: random.Random trying the candidates of every level in random order, None to try them from the lowest value up
+    """
+
+    def __init__(self, game, rng=None):
+        self.game = game
+        self.rng = rng
+        self.cells = game.cells
+        self.level_cells = []
+        self.level_remaining = []
+        self.level_marks = []
+        self.nodes = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        self.status = None
+
+    def start(self):
+        """Opens the first decision level, or finishes right away if the board is already solved"""
+        game = self.game
+        game.track_unset_fields()
+        if game.is_solved():
+            self.status = SOLVED
+            return
+        self.push_level(game.pick_unset_field())
+
+    def push_level(self, field):
+        self.game.buckets.remove(field.get_index())
+        self.level_cells.append(field.get_index())
+        self.level_remaining.append(field.get_domain_mask())
+        self.level_marks.append(self.game.trail.mark())
+        if len(self.level_cells) > self.max_depth:
+            self.max_depth = len(self.level_cells)
+
+    def run(self, max_nodes=None, timeout=None):
+        """
+        Runs (or resumes) the search.
+        :param max_nodes: pause after trying this many more assignments, None for no limit
+        :param timeout: pause after this many seconds, None for no limit
+        :return: SOLVED, EXHAUSTED or PAUSED
+        """
+        if self.status is None:
+            self.start()
+            if self.status == SOLVED:
+                return SOLVED
+
+        game = self.game
+        cells = self.cells
+        trail = game.trail
+        level_cells = self.level_cells
+        level_remaining = self.level_remaining
+        level_marks = self.level_marks
+        node_limit = None if max_nodes is None else self.nodes + max_nodes
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        # events are only emitted to an enabled instrumentation, so a plain search pays one test per node
+        emit = game.instrumentation.emit if game.instrumentation.enabled else None
+
+        while level_cells:
+            if node_limit is not None and self.nodes >= node_limit:
+                self.status = PAUSED
+                return PAUSED
+            if deadline is not None and time.perf_counter() >= deadline:
+                self.status = PAUSED
+                return PAUSED
+
+            field = cells[level_cells[-1]]
+            # roll back whatever the previous candidate of this level changed
+            trail.undo(level_marks[-1])
+
+            remaining = level_remaining[-1]
+            if remaining == 0:
+                if emit is not None:
+                    emit("backtrack", level_cells[-1], len(level_cells))
+                field.remove_value()
+                game.buckets.add(level_cells[-1], field.get_domain_mask())
+                level_cells.pop()
+                level_remaining.pop()
+                level_marks.pop()
+                self.backtracks += 1
+                continue
+
+            if self.rng is None:
+                bit = remaining & -remaining
+            else:
+                bit = value_to_bit(self.rng.choice(mask_to_values(remaining)))
+            level_remaining[-1] = remaining ^ bit
+            value = bit_to_value(bit)
+            field.set_value(value)
+            self.nodes += 1
+            if emit is not None:
+                emit("assign", level_cells[-1], value, len(level_cells))
+
+            if not game.check_neighbours(field) or not game.forward_check(field, value):
+                continue
+            if game.is_solved():
+                self.status = SOLVED
+                if emit is not None:
+                    emit("solved", game)
+                return SOLVED
+            self.push_level(game.pick_unset_field())
+
+        self.status = EXHAUSTED
+        return EXHAUSTED
+
+    def unwind(self):
+        """Abandons the search: every decision level is undone, the board is back to the state the search started from"""
+        if self.level_marks:
+            self.game.trail.undo(self.level_marks[0])
+        for cell in reversed(self.level_cells):
+            self.cells[cell].remove_value()
+            self.game.buckets.add(cell, self.cells[cell].get_domain_mask())
+        self.level_cells.clear()
+        self.level_remaining.clear()
+        self.level_marks.clear()
+        self.status = EXHAUSTED
+
+    def steps(self, every=1000, timeout=None):
+        """
+        Runs the search in slices of at most "every" nodes, yielding the status after each slice.
+        The caller gets control back between slices, e.g. to interleave several searches or to give up.
+        The generator ends after yielding SOLVED or EXHAUSTED, or PAUSED once the overall timeout is hit.
+        :param every: number of nodes per slice
+        :param timeout: overall time limit in seconds for all slices, None for no limit
+        """
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            remaining_time = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            status = self.run(every, remaining_time)
+            yield status
+            if status != PAUSED or (deadline is not None and time.perf_counter() >= deadline):
+                return
@@ -0,0 +1,291 @@
+"""
+Local solving service: an asyncio server over localhost TCP or a Unix socket, with the CPU work in a process pool.
+
+Protocol, one line per message in both directions:
+- request: an 81 character puzzle, or a JSON object {"id": ..., "puzzle": ..., "timeout": seconds, "level": 0-3}
+  where everything but the puzzle is optional. A plain puzzle line gets the number of the line (from 0) as its id.
+- response: a JSON object {"id", "status", "solution", "counters", "wall_time", "queue_time"}, status being
+  "solved", "unsolvable", "timeout" or "error" (with an "error" message instead of a solution)
+
+Responses are written as soon as their puzzle is done, not in request order, so one hard puzzle never holds back the
+easy ones sent after it: clients match responses to requests by id.
+
+At most max_in_flight puzzles are being solved or waiting for a worker at any time, over all connections. Once the limit
+is hit, the server stops reading requests until a slot frees up, and the socket buffers fill up back to the clients.
+
+Every request has a deadline, counted from the moment its line was read, so time spent waiting for a slot counts too.
+The worker passes what is left of it to the search as its timeout (see Search.run), which pauses the search and frees the
+worker for the next request instead of leaving it busy with a search nobody waits for anymore. Propagation can't be
+paused: it always finishes, and the deadline is checked before and after it, so a request only overruns its deadline by
+the propagation of one board, never by a search.
+"""
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from Game import Game, INIT_GIVENS
+from Search import PAUSED
+from Sudoku import Sudoku
+
+default_port = 8642
+default_timeout = 10.0  # seconds per request, when the request doesn't give its own
+
+
+def past(deadline):
+    """True if the time.time() deadline is set and over"""
+    return deadline is not None and time.time() >= deadline
+
+
+def solve_request(puzzle, h_type=-1, propagation_level=0, deadline=None):
+    """
+    Worker side of the service, solves one puzzle with the full solver of Game within a deadline
+    :param puzzle: 81 character puzzle string
+    :param propagation_level: see Game.propagate
+    :param deadline: time.time() by which to give up, None for no limit.
+        Wall clock time, since the deadline is set in the server process and checked in a worker.
+    :return: dict with the status, the solution, the counters (see Game.counters) and the wall time of the solve
+    """
+    start = time.perf_counter()
+    try:
+        # mostly easy puzzles: AC-3 starts from the givens, which also catches givens conflicting with each other
+        game = Game(Sudoku(puzzle=puzzle), h_type, True, init_mode=INIT_GIVENS)
+    except ValueError as error:
+        return {"status": "error", "error": str(error)}
+    solved = timed_out = False
+    # propagation always runs to its fixpoint, it can't be paused like the search: the deadline is checked before and
+    # after it, so a request that waited too long for a worker or spent its time propagating is not searched anymore
+    if past(deadline):
+        timed_out = True
+    elif game.propagate(propagation_level):
+        if game.solved_by_givens:
+            # nothing left to search, the answer is ready even if propagation ran past the deadline
+            solved = game.valid_solution()
+        elif past(deadline):
+            timed_out = True
+        else:
+            timeout = None if deadline is None else max(0.0, deadline - time.time())
+            solved = game.backtracker(timeout=timeout) and game.valid_solution()
+            timed_out = not solved and game.search is not None and game.search.status == PAUSED
+    if solved:
+        status = "solved"
+    elif timed_out:
+        status = "timeout"
+    else:
+        status = "unsolvable"
+    return {"status": status, "solution": game.sudoku.to_string() if solved else None,
+            "counters": game.counters(), "wall_time": time.perf_counter() - start}
+
+
+def parse_request(line, line_number):
+    """
+    Reads a request line, see the module docstring
+    :return: dict with the id, puzzle, timeout (None for the default) and level of the request
+    @raise ValueError: if the line is neither a puzzle nor a valid JSON request, fields of the wrong type included
+    """
+    if line.startswith("{"):
+        request = json.loads(line)
+        if not isinstance(request, dict) or not isinstance(request.get("puzzle"), str):
+            raise ValueError("A JSON request needs a puzzle string")
+        timeout = request.get("timeout")
+        # bool is an int too, but true is no number of seconds
+        if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, (int, float))
+                                    or not math.isfinite(timeout)):
+            raise ValueError(f"Invalid timeout {timeout!r}, give a number of seconds")
+        level = request.get("level", 0)
+        if isinstance(level, bool) or not isinstance(level, int) or level not in (0, 1, 2, 3):
+            raise ValueError(f"Invalid propagation level {level!r}, pick 0 to 3")
+        return {"id": request.get("id", line_number), "puzzle": request["puzzle"],
+                "timeout": None if timeout is None else float(timeout), "level": level}
+    return {"id": line_number, "puzzle": line, "timeout": None, "level": 0}
+
+
+class SolverService:
+    """
+    The server, see the module docstring.
+    Fields:
+    requests, solved, timeouts, errors: totals over all connections since the service started
+    """
+
+    def __init__(self, max_workers=None, max_in_flight=None, timeout=default_timeout, h_type=-1):
+        """
+        :param max_workers: number of worker processes, defaults to the number of CPUs
+        :param max_in_flight: puzzles solved or waiting for a worker at once, defaults to twice the number of workers,
+            so every worker has its next puzzle queued
+        :param timeout: deadline in seconds of requests that don't give their own, None for no limit
+        :param h_type: heuristic type used by AC-3, see Game
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or 2 * self.max_workers
+        self.timeout = timeout
+        self.h_type = h_type
+        self.executor = None
+        self.slots = None
+        self.server = None
+        self.requests = 0
+        self.solved = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    async def start(self, host="127.0.0.1", port=default_port, path=None):
+        """
+        Starts the worker pool and listens on localhost TCP, or on the Unix socket at path if given
+        :return: the asyncio server
+        """
+        # workers are started on demand, a forked one would inherit the sockets of the connections open at the time
+        # and keep them open after the server closes them
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self.executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context(method))
+        self.slots = asyncio.Semaphore(self.max_in_flight)
+        # start every worker before the first request, so no deadline pays for the process startup
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, os.getpid) for _ in range(self.max_workers)))
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self.handle_connection, path=path)
+        else:
+            self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def handle_connection(self, reader, writer):
+        """Reads the requests of a connection and answers each of them as soon as it is solved"""
+        tasks = set()
+        write_lock = asyncio.Lock()
+        line_number = 0
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                received = time.time()
+                # undecodable bytes end up in the puzzle, which then fails to parse with an error response
+                line = line.decode(errors="replace").strip()
+                if not line:
+                    continue
+                # a slot only once there is a request: idle connections hold none. While every slot is taken, this
+                # connection reads nothing more and its next requests stay in the socket buffers
+                await self.slots.acquire()
+                release = self.slot_releaser()
+                task = asyncio.create_task(self.answer(line, line_number, received, writer, write_lock, release))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                # a task cancelled before it started never runs its finally, its slot is released here instead
+                task.add_done_callback(lambda _: release())
+                line_number += 1
+            if tasks:
+                # every task answers its own request, one that failed doesn't take the others down with it
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    def slot_releaser(self):
+        """A function releasing one slot of the service on its first call, doing nothing on the next ones"""
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                self.slots.release()
+        return release
+
+    async def answer(self, line, line_number, received, writer, write_lock, release):
+        """
+        Solves one request in the pool and writes its response
+        :param release: releases the slot of the request, see slot_releaser, called once it is solved
+        """
+        try:
+            response = await self.solve(line, line_number, received)
+        except Exception as error:
+            # a bug of the service, not of the request: still answered, and the other requests carry on
+            self.errors += 1
+            response = {"id": line_number, "status": "error", "error": repr(error)}
+        finally:
+            release()
+        async with write_lock:
+            writer.write((json.dumps(response) + "\n").encode())
+            await writer.drain()
+
+    async def solve(self, line, line_number, received):
+        """
+        Solves one request line in the pool
+        :param received: time.time() at which the line was read, the deadline counts from there
+        :return: response dict, see the module docstring
+        """
+        self.requests += 1
+        try:
+            request = parse_request(line, line_number)
+        except (TypeError, ValueError) as error:
+            self.errors += 1
+            return {"id": line_number, "status": "error", "error": str(error)}
+
+        timeout = self.timeout if request["timeout"] is None else request["timeout"]
+        deadline = None if timeout is None else received + timeout
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(self.executor, solve_request, request["puzzle"], self.h_type,
+                                                request["level"], deadline)
+        except Exception as error:
+            # e.g. a worker died, the other requests carry on
+            self.errors += 1
+            return {"id": request["id"], "status": "error", "error": repr(error)}
+        status = result["status"]
+        if status == "solved":
+            self.solved += 1
+        elif status == "timeout":
+            self.timeouts += 1
+        elif status == "error":
+            self.errors += 1
+        result["id"] = request["id"]
+        # time from reading the line to the worker being done, minus the solve itself
+        result["queue_time"] = max(0.0, time.time() - received - result.get("wall_time", 0.0))
+        return result
+
+
+async def serve(service, host="127.0.0.1", port=default_port, path=None):
+    """Runs the service until cancelled"""
+    server = await service.start(host, port, path)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the solver over localhost TCP or a Unix socket, "
+                                                 "one puzzle per line in, one JSON result per line out.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=default_port)
+    parser.add_argument("--unix", help="listen on a Unix socket at this path instead of TCP")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-in-flight", type=int, default=None,
+                        help="puzzles solved or queued at once, over all connections")
+    parser.add_argument("--timeout", type=float, default=default_timeout,
+                        help="deadline in seconds of requests without their own")
+    parser.add_argument("--heuristic", type=int, default=-1, help="AC-3 heuristic, -1 to 2")
+    args = parser.parse_args()
+
+    solver_service = SolverService(args.workers, args.max_in_flight, args.timeout, args.heuristic)
+    where = args.unix if args.unix else f"{args.host}:{args.port}"
+    print(f"Solving on {where} with {solver_service.max_workers} workers")
+    try:
+        asyncio.run(serve(solver_service, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
@@ -1,84 +1,183 @@
+from array import array
+from Domain import full_domain
 from Field import Field
+from Topology import get_topology
+
+# characters of the values 1 to 35 in puzzle strings: digits, then letters, e.g. 1-9 and A-G on a 16x16 board
+SYMBOLS = "123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+BLANKS = "0."
+
+
+def symbol_of(value):
+    """The character of a value in puzzle strings, '0' for an unset field"""
+    return SYMBOLS[value - 1] if value else "0"
+
+
+def box_size_for(field_count):
+    """
+    The box size n of a board with n^4 fields
+    @raise ValueError: if field_count is not the number of fields of any board
+    """
+    n = round(field_count ** 0.25)
+    if n < 2 or n ** 4 != field_count:
+        raise ValueError(f"A puzzle needs n^4 fields (16, 81, 256, 625, ...), got {field_count}")
+    return n
+
+
+def _snapshot_typecode(size):
+    """array typecode of the snapshots of a board with values 1 to size, the domain masks need size bits"""
+    return "H" if size <= 16 else "I"
 
 
 class Sudoku:
-    def __init__(self, filename):
-        self.NO_ROWS: int = 9
-        self.NO_COLS: int = 9
-        self.board = self.read_sudoku(filename)
+    def __init__(self, filename=None, puzzle=None, snapshot=None, box_size=None):
+        """
+        Either reads the board from a sudoku file, parses it from a single-line puzzle string, or rebuilds it from a snapshot.
+        @param filename: Sudoku filename, e.g. in the 9 lines format of the Sudokus folder, see read_sudoku
+        @param puzzle: puzzle string, see parse_puzzle. Takes precedence over filename.
+        @param snapshot: board state taken with snapshot(), takes precedence over both
+        @param box_size: n for a board of n*n x n*n fields (3 for a regular sudoku), None to infer it from the puzzle
+        """
+        if snapshot is not None:
+            if box_size is None:
+                box_size = Sudoku.snapshot_box_size(snapshot)
+            size = box_size * box_size
+            self.board = [[Field(full_domain=full_domain(size)) for _ in range(size)] for _ in range(size)]
+            Sudoku.index_fields(self.board)
+        elif puzzle is not None:
+            self.board = self.parse_puzzle(puzzle, box_size)
+        else:
+            self.board = self.read_sudoku(filename, box_size)
+        self.NO_ROWS: int = len(self.board)
+        self.NO_COLS: int = len(self.board)
+        self.topology = get_topology(round(len(self.board) ** 0.5))
+        # the same Field objects as in board, flattened in row-major order so they can be addressed by cell index
+        self.cells = [field for row in self.board for field in row]
+        if snapshot is not None:
+            self.restore(snapshot)
 
     def __str__(self):
-        output = "╔═══════╦═══════╦═══════╗\n"
+        box = self.topology.box_size
+        segment = "═" * (2 * box + 1)
+        output = "╔" + "╦".join([segment] * box) + "╗\n"
         # iterate through rows
-        for i in range(9):
-            if i == 3 or i == 6:
-                output += "╠═══════╬═══════╬═══════╣\n"
+        for i in range(self.NO_ROWS):
+            if i != 0 and i % box == 0:
+                output += "╠" + "╬".join([segment] * box) + "╣\n"
             output += "║ "
             # iterate through columns
-            for j in range(9):
-                if j == 3 or j == 6:
+            for j in range(self.NO_COLS):
+                if j != 0 and j % box == 0:
                     output += "║ "
-                output += str(self.board[i][j]) + " "
+                value = self.board[i][j].get_value()
+                output += ("." if value == 0 else symbol_of(value)) + " "
             output += "║\n"
-        output += "╚═══════╩═══════╩═══════╝\n"
+        output += "╚" + "╩".join([segment] * box) + "╝\n"
         return output
 
     @staticmethod
-    def read_sudoku(filename):
+    def read_sudoku(filename, box_size=None):
         """
-        Read in a sudoku file
+        Read in a sudoku file, holding the board in any format parse_puzzle accepts,
+        e.g. one line per row like the files of the Sudokus folder
         @param filename: Sudoku filename
-        @return: A 9x9 grid of Fields where each field is initialized with all its neighbor fields
+        @param box_size: see parse_puzzle
+        @return: A size x size grid of Fields where each field knows its cell index in the shared topology
         """
         assert filename is not None and filename != "", "Invalid filename"
-        # Setup 9x9 grid
-        grid = [[Field for _ in range(9)] for _ in range(9)]
-
         try:
             with open(filename, "r") as file:
-                for row, line in enumerate(file):
-                    for col_index, char in enumerate(line):
-                        if char == '\n':
-                            continue
-                        if int(char) == 0:
-                            grid[row][col_index] = Field()
-                        else:
-                            grid[row][col_index] = Field(int(char))
-
+                text = file.read()
         except FileNotFoundError:
             print("Error opening file: " + filename)
+            raise
+
+        return Sudoku.parse_puzzle(text, box_size)
 
-        Sudoku.add_neighbours(grid)
+    @staticmethod
+    def parse_puzzle(puzzle, box_size=None):
+        """
+        Parse a puzzle given row by row, in one of two forms:
+        - one character per field: '0' or '.' for unset fields, then the SYMBOLS (1-9 on a 9x9 board, 1-9 and A-G on
+          a 16x16 board), whitespace is ignored
+        - one token per field, separated by whitespace or commas, which allows multi-digit values (e.g. "12 0 7 ...")
+        @param puzzle: the puzzle string
+        @param box_size: n for a board of n^4 fields, None to infer it from the number of fields
+        @return: A size x size grid of Fields, like read_sudoku
+        """
+        tokens = puzzle.replace(",", " ").split()
+        values = Sudoku._token_values(tokens, box_size)
+        if values is None:
+            chars = "".join(tokens)
+            if box_size is None:
+                box_size = box_size_for(len(chars))
+            elif len(chars) != box_size ** 4:
+                raise ValueError(f"A puzzle needs {box_size ** 4} fields, got {len(chars)}: {puzzle!r}")
+            symbols = SYMBOLS[:box_size * box_size]
+            values = []
+            for char in chars:
+                if char in BLANKS:
+                    values.append(0)
+                elif char.upper() in symbols:
+                    values.append(symbols.index(char.upper()) + 1)
+                else:
+                    raise ValueError(f"Invalid character {char!r} in puzzle: {puzzle!r}")
+
+        size = round(len(values) ** 0.5)
+        domain = full_domain(size)
+        grid = []
+        for row in range(size):
+            grid_row = []
+            for value in values[row * size:(row + 1) * size]:
+                grid_row.append(Field(value) if value else Field(full_domain=domain))
+            grid.append(grid_row)
+
+        Sudoku.index_fields(grid)
         return grid
 
     @staticmethod
-    def add_neighbours(grid):
-        """
-        Adds a list of neighbors to each field
-        @param grid: 9x9 list of Fields
-        """
-        for row in range(0,9):
-            for col in range(0,9):
-                n = []
-                # Add neighbors in the same row
-                for col_i in range(9):
-                    if col_i != col:  # Exclude  itself
-                        n.append(grid[row][col_i])
-
-                # Add neighbors in the same column
-                for row_i in range(9):
-                    if row_i != row:  # Exclude itself
-                        n.append(grid[row_i][col])
-
-                # Add neighbors in the same 3x3 block
-                block_row_start = (row // 3) * 3
-                block_col_start = (col // 3) * 3
-                for i in range(block_row_start, block_row_start + 3):
-                    for j in range(block_col_start, block_col_start + 3):
-                        if (i != row or j != col) and grid[i][j] not in n:  # Exclude itself
-                            n.append(grid[i][j])
-                            
-                grid[row][col].set_neighbours(n)
+    def _token_values(tokens, box_size):
+        """
+        The values of a puzzle with one token per field, see parse_puzzle
+        @return: list of values, or None if the tokens aren't one field each
+        """
+        if box_size is None:
+            try:
+                box_size = box_size_for(len(tokens))
+            except ValueError:
+                return None
+        elif len(tokens) != box_size ** 4:
+            return None
+        size = box_size * box_size
+        symbols = SYMBOLS[:size]
+        values = []
+        for token in tokens:
+            if token in BLANKS:
+                values.append(0)
+            elif token.isdigit() and 1 <= int(token) <= size:
+                values.append(int(token))
+            elif len(token) == 1 and token.upper() in symbols:
+                values.append(symbols.index(token.upper()) + 1)
+            else:
+                return None
+        return values
+
+    @staticmethod
+    def index_fields(grid):
+        """Tells every field of the grid its cell index in the shared topology"""
+        size = len(grid)
+        for row in range(size):
+            for col in range(size):
+                grid[row][col].set_index(row * size + col)
+
+    def get_neighbours(self, field):
+        """
+        The neighbours of a field, looked up in the shared topology instead of being stored per field
+        @param field: a Field of this board
+        @return: list of the Fields constraining the given field (20 on a 9x9 board)
+        """
+        cells = self.cells
+        return [cells[n] for n in self.topology.peers[field.get_index()]]
 
     def board_to_string(self):
 
@@ -89,5 +188,54 @@ class Sudoku:
             output += "\n"
         return output
 
+    def to_string(self):
+        """
+        Inverse of parse_puzzle
+        @return: the board as one line of one symbol per field (81 digits on a 9x9 board), unset fields are '0'
+        """
+        return "".join(symbol_of(field.get_value()) for field in self.cells)
+
     def get_board(self):
         return self.board
+
+    # region snapshots
+
+    def snapshot(self):
+        """
+        Takes the state of the board: the values, then the domain masks, of the fields by cell index,
+        as 16-bit integers (32-bit above 16x16, the masks need more bits).
+        Snapshots are immutable, so one can be shared by any number of boards, which only copy it when restoring.
+        @return: bytes
+        """
+        cells = self.cells
+        state = array(_snapshot_typecode(self.topology.size), [field.get_value() for field in cells])
+        state.extend([field.get_domain_mask() for field in cells])
+        return state.tobytes()
+
+    def restore(self, snapshot):
+        """
+        Puts the board back in the state of a snapshot, in place: the Fields are kept, so is everything referencing them.
+        @param snapshot: bytes taken with snapshot(), on this board or any other one of the same size
+        """
+        state = array(_snapshot_typecode(self.topology.size))
+        state.frombytes(snapshot)
+        cells = self.cells
+        count = len(cells)
+        for i, field in enumerate(cells):
+            field.set_value(state[i])
+            field.set_domain_mask(state[count + i])
+
+    @staticmethod
+    def snapshot_box_size(snapshot):
+        """The box size of the board a snapshot was taken on"""
+        for box_size in range(2, 6):
+            size = box_size * box_size
+            if len(snapshot) == 2 * size * size * array(_snapshot_typecode(size)).itemsize:
+                return box_size
+        raise ValueError(f"Not a snapshot of a board: {len(snapshot)} bytes")
+
+    def clone(self):
+        """A new board in the same state, without reading or parsing the puzzle again"""
+        return Sudoku(snapshot=self.snapshot(), box_size=self.topology.box_size)
+
+    # endregion
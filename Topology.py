@@ -0,0 +1,108 @@
+class Topology:
+    """
+    Immutable constraint graph of a sudoku, expressed with cell indices (row * size + col) only.
+    The graph is the same for every board of the same size, so it is built once per process and size (see get_topology)
+    and shared by all Sudoku and Game instances, instead of every board wiring up its own neighbour lists.
+
+    Fields:
+    box_size: n, the side of a block; the board has size = n * n rows, columns, blocks and values
+    peers: for every cell, the tuple of the cells sharing a row, column or block with it (20 on a 9x9 board)
+    arc_src, arc_dst: arc a is the constraint (arc_src[a], arc_dst[a]), where arc_src[a] is the revised cell
+    cell_arcs: for every cell, the ids of all arcs (cell, peer), in peer order
+    cell_in_arcs: for every cell, the ids of all arcs (peer, cell), in peer order
+    arc_requeue: for every arc (x, y), the ids of the arcs (n, x) for all peers n of x except y.
+        These are exactly the arcs AC-3 has to revisit after the domain of x was revised through (x, y).
+    rows, cols, boxes: the cells of every row, column and block, each a tuple of cell tuples
+    units: rows + cols + boxes, every group of cells that has to hold all values exactly once
+    cell_row, cell_col, cell_box: for every cell, the number of its row, column and block
+    """
+
+    def __init__(self, box_size=3):
+        self.box_size = box_size
+        self.size = box_size * box_size
+        self.cell_count = self.size * self.size
+
+        self.peers = tuple(tuple(self._compute_peers(cell)) for cell in range(self.cell_count))
+
+        arc_src = []
+        arc_dst = []
+        arc_id = {}
+        cell_arcs = []
+        for cell in range(self.cell_count):
+            ids = []
+            for peer in self.peers[cell]:
+                arc_id[(cell, peer)] = len(arc_src)
+                ids.append(len(arc_src))
+                arc_src.append(cell)
+                arc_dst.append(peer)
+            cell_arcs.append(tuple(ids))
+
+        self.arc_src = tuple(arc_src)
+        self.arc_dst = tuple(arc_dst)
+        self.arc_count = len(arc_src)
+        self.cell_arcs = tuple(cell_arcs)
+        self.cell_in_arcs = tuple(tuple(arc_id[(n, cell)] for n in self.peers[cell]) for cell in range(self.cell_count))
+        size = self.size
+        self.rows = tuple(tuple(r * size + c for c in range(size)) for r in range(size))
+        self.cols = tuple(tuple(r * size + c for r in range(size)) for c in range(size))
+        self.boxes = tuple(
+            tuple(r * size + c
+                  for r in range(br, br + box_size)
+                  for c in range(bc, bc + box_size))
+            for br in range(0, size, box_size)
+            for bc in range(0, size, box_size)
+        )
+        self.units = self.rows + self.cols + self.boxes
+        self.cell_row = tuple(cell // size for cell in range(self.cell_count))
+        self.cell_col = tuple(cell % size for cell in range(self.cell_count))
+        self.cell_box = tuple((cell // size) // box_size * box_size + (cell % size) // box_size
+                              for cell in range(self.cell_count))
+
+        # the arcs (n, x) are cell_in_arcs[x], in the same peer order as the arcs (x, n) in cell_arcs[x],
+        # so leaving out (y, x) is a slice around the position of (x, y)
+        cell_in_arcs = self.cell_in_arcs
+        requeue = []
+        for x in range(self.cell_count):
+            in_arcs = cell_in_arcs[x]
+            for j in range(len(in_arcs)):
+                requeue.append(in_arcs[:j] + in_arcs[j + 1:])
+        self.arc_requeue = tuple(requeue)
+
+    def _compute_peers(self, cell):
+        """
+        All cells constrained by the given cell: same row, then same column, then the rest of the block
+        @param cell: index of the cell
+        @return: list of peer indices, without duplicates and without the cell itself
+        """
+        size = self.size
+        row, col = divmod(cell, size)
+        peers = [row * size + c for c in range(size) if c != col]
+        peers += [r * size + col for r in range(size) if r != row]
+
+        block_row_start = (row // self.box_size) * self.box_size
+        block_col_start = (col // self.box_size) * self.box_size
+        for r in range(block_row_start, block_row_start + self.box_size):
+            for c in range(block_col_start, block_col_start + self.box_size):
+                # cells in the same row or column of the block were already added above
+                if r != row and c != col:
+                    peers.append(r * size + c)
+        return peers
+
+    def index(self, row, col):
+        return row * self.size + col
+
+
+# the topology of a regular 9x9 sudoku, computed on import
+TOPOLOGY = Topology(3)
+
+_topologies = {3: TOPOLOGY}
+
+
+def get_topology(box_size):
+    """The shared topology of boards with blocks of box_size x box_size, built on first use"""
+    topology = _topologies.get(box_size)
+    if topology is None:
+        if box_size < 1:
+            raise ValueError(f"Invalid box size {box_size}")
+        topology = _topologies[box_size] = Topology(box_size)
+    return topology
@@ -0,0 +1,46 @@
+class Trail:
+    """
+    Undo stack for the domain changes made during backtracking search.
+    Before a domain is changed, the index of its field and the old domain mask are saved on the trail.
+    A decision level is just the height of the trail when it started (see mark), and undoing the level means restoring
+    every mask saved above that height, newest first, then truncating the trail back to it.
+
+    The trail is preallocated: every field can be saved at most once per level (per forward check),
+    by at most its number of peers, over at most one level per field, which is exactly the number of arcs.
+    So a search never has to grow it, and saving a change allocates nothing.
+    """
+
+    def __init__(self, cells, capacity):
+        """
+        :param cells: the Fields of the board, by cell index
+        :param capacity: maximum number of saved changes, the arc count of the topology
+        """
+        self.cells = cells
+        self.saved_cells = [0] * capacity
+        self.saved_masks = [0] * capacity
+        self.top = 0
+        # DomainBuckets to notify of restored domains, if any
+        self.buckets = None
+
+    def mark(self):
+        """Start of a decision level, to be passed to undo"""
+        return self.top
+
+    def save(self, cell, mask):
+        """Remember that the field at index cell had the domain mask before it is changed"""
+        top = self.top
+        self.saved_cells[top] = cell
+        self.saved_masks[top] = mask
+        self.top = top + 1
+
+    def undo(self, mark):
+        """Restore all domains changed since mark was taken"""
+        cells = self.cells
+        saved_cells = self.saved_cells
+        saved_masks = self.saved_masks
+        buckets = self.buckets
+        for i in range(self.top - 1, mark - 1, -1):
+            cells[saved_cells[i]].set_domain_mask(saved_masks[i])
+            if buckets is not None:
+                buckets.resize(saved_cells[i], saved_masks[i])
+        self.top = mark
@@ -0,0 +1,129 @@
+from collections import deque
+import heapq
+
+
+class Worklist:
+    """
+    Interface of the arc worklists used by AC-3. A worklist holds arc ids (see Topology.py) and hands them out with pop()
+    in the order of its discipline, so the solver itself does not need to know which discipline is in use.
+
+    Fields:
+    dedup: if True, an arc that is still waiting in the worklist is not pushed again
+    pending: one flag per arc id, set while the arc is waiting. Only maintained if dedup is True.
+    pushes, pops: number of arcs pushed and popped so far
+    """
+
+    def __init__(self, arc_count, dedup=False):
+        self.dedup = dedup
+        self.pending = bytearray(arc_count)
+        self.pushes = 0
+        self.pops = 0
+
+    def push(self, arc):
+        raise NotImplementedError
+
+    def pop(self):
+        """Removes and returns the next arc id, the worklist must not be empty"""
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+    # True if the worklist orders arcs by priorities that have to be kept up to date with reprioritise
+    live_priorities = False
+
+    def reprioritise(self, arcs):
+        """Called with the arcs whose priority may have changed, only priority based worklists need to react"""
+        pass
+
+
+class FifoWorklist(Worklist):
+    """
+    First in, first out. Backed by a deque rather than queue.Queue, AC-3 is single threaded so the locking
+    queue.Queue does on every put and get is pure overhead.
+    """
+
+    def __init__(self, arc_count, dedup=False):
+        super().__init__(arc_count, dedup)
+        self.arcs = deque()
+
+    def push(self, arc):
+        if self.dedup:
+            if self.pending[arc]:
+                return
+            self.pending[arc] = 1
+        self.pushes += 1
+        self.arcs.append(arc)
+
+    def pop(self):
+        arc = self.arcs.popleft()
+        self.pops += 1
+        self.pending[arc] = 0
+        return arc
+
+    def __len__(self):
+        return len(self.arcs)
+
+
+class PriorityWorklist(Worklist):
+    """
+    Lowest priority first, implemented as a minimum heap with lazy invalidation.
+    A heap entry is the single integer priority * arc_count + arc id, so the heap only ever compares ints and ties are
+    broken by arc id. The entry currently valid for every waiting arc is remembered in entry: when the priority of a
+    waiting arc changes (see reprioritise), a new entry is pushed and the old one becomes stale, it is dropped when popped.
+    This keeps the order in line with the live domain sizes at the cost of a few stale entries, without a decrease-key.
+    An arc is only ever waiting once, so this worklist always deduplicates, regardless of the dedup flag.
+    """
+
+    live_priorities = True
+
+    def __init__(self, arc_count, priority_of, dedup=False):
+        """
+        :param priority_of: function mapping an arc id to its integer priority, lower is popped first
+        """
+        super().__init__(arc_count, dedup)
+        self.arc_count = arc_count
+        self.priority_of = priority_of
+        self.heap = []
+        self.entry = [-1] * arc_count  # valid heap entry of every waiting arc, -1 if the arc is not waiting
+        self.waiting = 0
+
+    def push(self, arc):
+        # already waiting, its priority is kept up to date through reprioritise
+        if self.entry[arc] != -1:
+            return
+        entry = self.priority_of(arc) * self.arc_count + arc
+        self.entry[arc] = entry
+        heapq.heappush(self.heap, entry)
+        self.waiting += 1
+        self.pushes += 1
+
+    def pop(self):
+        heap = self.heap
+        while True:
+            entry = heapq.heappop(heap)
+            arc = entry % self.arc_count
+            if self.entry[arc] == entry:
+                break
+        self.entry[arc] = -1
+        self.waiting -= 1
+        self.pops += 1
+        return arc
+
+    def __len__(self):
+        return self.waiting
+
+    def reprioritise(self, arcs):
+        """
+        Recomputes the priority of the given arcs, and re-pushes the waiting ones whose priority changed
+        :param arcs: iterable of arc ids, arcs that are not waiting are ignored
+        """
+        entries = self.entry
+        for arc in arcs:
+            old_entry = entries[arc]
+            if old_entry == -1:
+                continue
+            new_entry = self.priority_of(arc) * self.arc_count + arc
+            if new_entry != old_entry:
+                entries[arc] = new_entry
+                heapq.heappush(self.heap, new_entry)
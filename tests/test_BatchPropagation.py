@@ -0,0 +1,54 @@
+import os
+import random
+import pytest
+
+np = pytest.importorskip("numpy")
+from BatchPropagation import solve_masks, puzzles_to_masks, propagate_masks, SOLVED, CONTRADICTION
+from Sudoku import Sudoku
+
+SUDOKUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Sudokus")
+SOLUTION = "534678912672195348198342567859761423426853791713924856961537284287419635345286179"
+# singles of the same round giving two peers the same value, they used to come out as solved
+CLASHING = ["500078002070095040198302500050001400006050790703000850060530084040009605000000100",
+            "534600912672195308198040507009761023426003791713200056061037204287400630045006179"]
+
+
+def assert_valid_solution(solution, puzzle):
+    rows = [solution[r * 9:r * 9 + 9] for r in range(9)]
+    cols = ["".join(row[c] for row in rows) for c in range(9)]
+    boxes = ["".join(rows[r][c] for r in range(br, br + 3) for c in range(bc, bc + 3))
+             for br in (0, 3, 6) for bc in (0, 3, 6)]
+    for unit in rows + cols + boxes:
+        assert sorted(unit) == list("123456789"), solution
+    assert all(given in "0." or given == value for given, value in zip(puzzle, solution))
+
+
+def puzzles():
+    with_files = [Sudoku(os.path.join(SUDOKUS, name)).to_string() for name in sorted(os.listdir(SUDOKUS))]
+    rng = random.Random(7)
+    holes = []
+    for _ in range(200):
+        puzzle = list(SOLUTION)
+        for i in rng.sample(range(81), rng.randint(30, 55)):
+            puzzle[i] = "0"
+        holes.append("".join(puzzle))
+    return with_files + holes + CLASHING
+
+
+@pytest.mark.parametrize("hidden_singles", [True, False])
+def test_every_solution_satisfies_the_units(hidden_singles):
+    boards = puzzles()
+    results = list(solve_masks(boards, hidden_singles))
+    assert len(results) == len(boards)
+    for puzzle, (solution, _) in zip(boards, results):
+        if solution is not None:
+            assert_valid_solution(solution, puzzle)
+    # the boards with holes in a full solution always have one
+    assert all(solution is not None for solution, _ in results[-200 - len(CLASHING):-len(CLASHING)])
+
+
+@pytest.mark.parametrize("hidden_singles", [True, False])
+def test_clashing_singles_are_contradictions(hidden_singles):
+    status = propagate_masks(puzzles_to_masks(CLASHING), hidden_singles)
+    assert (status == CONTRADICTION).all()
+    assert not (status == SOLVED).any()
@@ -0,0 +1,26 @@
+import pytest
+
+from BenchmarkSuite import Configuration, percentile, run_configuration
+
+PUZZLES = ["000000010400000000020000000000050407008000300001090000300400200050100000000806000",
+           "000006080009105372080700016000000034000351000730000000610008020823904600070600000"]
+
+
+def test_repetitions_must_be_positive():
+    with pytest.raises(ValueError):
+        run_configuration(Configuration("fc"), PUZZLES, warmup=0, repetitions=0, memory=False)
+
+
+def test_counters_are_those_of_each_puzzle():
+    single = [run_configuration(Configuration("fc"), [puzzle], warmup=0, repetitions=1, memory=False)
+              for puzzle in PUZZLES]
+    both = run_configuration(Configuration("fc"), PUZZLES, warmup=0, repetitions=2, memory=False)
+    assert both["solved"] == 2
+    assert both["repetitions"] == 2
+    nodes = sorted(row["nodes_p50"] for row in single)
+    assert both["nodes_p50"] == percentile(nodes, 50)
+
+
+def test_percentile_interpolates():
+    assert percentile([1, 2, 3, 4], 50) == 2.5
+    assert percentile([5], 99) == 5
@@ -0,0 +1,61 @@
+import pytest
+
+from Buckets import DomainBuckets, TIE_BREAK_ANY, TIE_BREAK_DEGREE, TIE_BREAK_INDEX
+from Game import Game
+from Search import Search, PAUSED
+from Sudoku import Sudoku
+
+PUZZLE = "000000010400000000020000000000050407008000300001090000300400200050100000000806000"
+
+
+def assert_in_step(game):
+    """
+    The buckets hold exactly the unset fields, each in the bucket of its current domain size.
+    The fields of the open decision levels have left the buckets, even while they have no value between two candidates.
+    """
+    buckets = game.buckets
+    deciding = set(game.search.level_cells)
+    expected = [0] * len(buckets.buckets)
+    for field in game.cells:
+        cell = field.get_index()
+        if field.get_value() == 0 and cell not in deciding:
+            size = field.get_domain_mask().bit_count()
+            assert buckets.size_of[cell] == size
+            expected[size] |= 1 << cell
+        else:
+            assert buckets.size_of[cell] == -1
+    assert buckets.buckets == expected
+    assert buckets.unset == sum(bucket.bit_count() for bucket in expected)
+
+
+def test_pick_by_index_and_degree():
+    game = Game(Sudoku(puzzle=PUZZLE), -1, True)
+    assert game.AC_3()
+    unset = [field for field in game.cells if field.get_value() == 0]
+    smallest = min(field.get_domain_size() for field in unset)
+    candidates = [field.get_index() for field in unset if field.get_domain_size() == smallest]
+    peers = game.topology.peers
+    for tie_break, expected in ((TIE_BREAK_INDEX, min(candidates)), (TIE_BREAK_ANY, min(candidates)),
+                                (TIE_BREAK_DEGREE, min(candidates, key=lambda c: (
+                                    -sum(game.cells[p].get_value() == 0 for p in peers[c]), c)))):
+        assert DomainBuckets(game.cells, peers, tie_break).pick() == expected
+
+
+def test_empty_buckets_pick_nothing():
+    game = Game(Sudoku(puzzle=PUZZLE), -1, True)
+    assert game.full_solver()
+    assert DomainBuckets(game.cells, game.topology.peers).pick() == -1
+
+
+@pytest.mark.parametrize("tie_break", [TIE_BREAK_INDEX, TIE_BREAK_DEGREE])
+def test_buckets_follow_assign_and_undo(tie_break):
+    game = Game(Sudoku(puzzle=PUZZLE), -1, True, tie_break=tie_break)
+    assert game.AC_3()
+    game.search = search = Search(game)
+    # pauses land after assignments, forward checks and backtracks of every kind
+    while search.run(max_nodes=7) == PAUSED:
+        assert_in_step(game)
+        cell = game.pick_unset_field().get_index()
+        assert game.buckets.size_of[cell] == min(size for size in game.buckets.size_of if size != -1)
+    search.unwind()
+    assert_in_step(game)
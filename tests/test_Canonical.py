@@ -0,0 +1,64 @@
+import os
+import random
+import pytest
+
+from Canonical import SolutionCache, Transform, canonicalise
+from Game import Game
+from Sudoku import Sudoku
+
+SUDOKUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Sudokus")
+PUZZLES = [Sudoku(os.path.join(SUDOKUS, name)).to_string() for name in sorted(os.listdir(SUDOKUS))]
+
+
+def random_transform(rng):
+    """A random symmetry: bands, rows within bands, stacks, columns within stacks, digits and transposition"""
+    def line_order():
+        bands = rng.sample(range(3), 3)
+        return [band * 3 + row for band in bands for row in rng.sample(range(3), 3)]
+    return Transform(rng.random() < 0.5, line_order(), line_order(), [0] + rng.sample(range(1, 10), 9))
+
+
+def solve(puzzle):
+    game = Game(Sudoku(puzzle=puzzle), -1, True)
+    assert game.full_solver() and game.valid_solution()
+    return game.sudoku.to_string()
+
+
+def solves(solution, puzzle):
+    return Game(Sudoku(puzzle=solution), -1, True).valid_solution() and all(
+        given in "0." or given == value for given, value in zip(puzzle, solution))
+
+
+@pytest.mark.parametrize("puzzle", PUZZLES)
+def test_canonical_form_is_invariant(puzzle):
+    rng = random.Random(puzzle)
+    canonical, _ = canonicalise(puzzle)
+    for _ in range(5):
+        assert canonicalise(random_transform(rng).apply(puzzle))[0] == canonical
+
+
+@pytest.mark.parametrize("puzzle", PUZZLES)
+def test_transform_inverts_back_to_the_solution(puzzle):
+    solution = solve(puzzle)
+    canonical, transform = canonicalise(puzzle)
+    assert transform.apply(puzzle) == canonical
+    assert transform.invert(transform.apply(solution)) == solution
+    assert transform.invert(solve(canonical)) == solution
+
+
+def test_dotted_puzzles_have_the_same_form():
+    puzzle = PUZZLES[0]
+    assert canonicalise(puzzle.replace("0", "."))[0] == canonicalise(puzzle)[0]
+
+
+def test_cache_hit_answers_an_equivalent_puzzle():
+    rng = random.Random(3)
+    cache = SolutionCache()
+    puzzle = PUZZLES[2]
+    assert cache.solve(puzzle) == solve(puzzle)
+    assert cache.misses == 1
+    equivalent = random_transform(rng).apply(puzzle)
+    assert equivalent != puzzle
+    solution = cache.get(equivalent.replace("0", "."))
+    assert cache.hits == 1
+    assert solves(solution, equivalent)
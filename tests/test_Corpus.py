@@ -0,0 +1,79 @@
+import os
+import random
+import struct
+import pytest
+
+from Corpus import (Corpus, HEADER, HEADER_SIZE, MAGIC, VERSION, decode_record, encode_puzzle, record_size,
+                    write_corpus)
+from Sudoku import SYMBOLS
+
+
+def random_puzzles(box_size, count, seed=0):
+    rng = random.Random(seed)
+    symbols = "0" + SYMBOLS[:box_size * box_size]
+    return ["".join(rng.choice(symbols) for _ in range(box_size ** 4)) for _ in range(count)]
+
+
+@pytest.mark.parametrize("box_size", [2, 3, 4, 5])
+def test_round_trip(tmp_path, box_size):
+    puzzles = random_puzzles(box_size, 50, box_size)
+    for puzzle in puzzles:
+        record = encode_puzzle(puzzle, box_size)
+        assert len(record) == record_size(box_size)
+        assert decode_record(record, box_size) == puzzle
+
+    path = str(tmp_path / "puzzles.sdk")
+    assert write_corpus(path, puzzles) == len(puzzles)
+    assert os.path.getsize(path) == HEADER_SIZE + len(puzzles) * record_size(box_size)
+    with Corpus(path) as corpus:
+        assert corpus.box_size == box_size
+        assert list(corpus) == puzzles
+        assert corpus[-1] == puzzles[-1]
+        assert corpus.sudoku(3).to_string() == puzzles[3]
+
+
+def test_empty_corpus_header(tmp_path):
+    path = str(tmp_path / "empty.sdk")
+    assert write_corpus(path, []) == 0
+    with open(path, "rb") as file:
+        assert file.read() == HEADER.pack(MAGIC, VERSION, 3, 4, 0)
+    with Corpus(path) as corpus:
+        assert len(corpus) == 0
+        assert list(corpus) == []
+
+
+@pytest.mark.parametrize("magic, version", [(b"SDKX", VERSION), (MAGIC, VERSION + 1)])
+def test_bad_header_is_rejected(tmp_path, magic, version):
+    path = str(tmp_path / "bad.sdk")
+    write_corpus(path, random_puzzles(3, 2))
+    with open(path, "r+b") as file:
+        file.write(struct.pack("<4sB", magic, version))
+    with pytest.raises(ValueError):
+        Corpus(path)
+
+
+def test_truncated_corpus_is_rejected(tmp_path):
+    path = str(tmp_path / "short.sdk")
+    write_corpus(path, random_puzzles(3, 2))
+    with open(path, "r+b") as file:
+        file.truncate(HEADER_SIZE + record_size(3))
+    with pytest.raises(ValueError):
+        Corpus(path)
+
+
+def test_failed_write_keeps_the_previous_corpus(tmp_path):
+    path = str(tmp_path / "puzzles.sdk")
+    puzzles = random_puzzles(3, 3)
+    write_corpus(path, puzzles)
+    with pytest.raises(ValueError):
+        write_corpus(path, puzzles + ["not a puzzle"], box_size=3)
+    assert sorted(os.listdir(tmp_path)) == ["puzzles.sdk"]
+    with Corpus(path) as corpus:
+        assert list(corpus) == puzzles
+
+
+def test_missing_directory_raises_its_own_error(tmp_path):
+    path = str(tmp_path / "missing" / "puzzles.sdk")
+    with pytest.raises(FileNotFoundError) as error:
+        write_corpus(path, random_puzzles(3, 1))
+    assert error.value.filename == path + ".part"
@@ -0,0 +1,63 @@
+import os
+import random
+import pytest
+
+from DLX import DancingLinks, DLXGame
+from Game import Game
+from Sudoku import Sudoku
+
+SUDOKUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Sudokus")
+FILES = [Sudoku(os.path.join(SUDOKUS, name)).to_string() for name in sorted(os.listdir(SUDOKUS))]
+UNIQUE = "000000010400000000020000000000050407008000300001090000300400200050100000000806000"
+# UNIQUE with its first clues removed, it has many solutions
+MANY = "000000000000000000000000000000050407008000300001090000300400200050100000000806000"
+# givens that don't clash, but leave 9 as the only value of the last field of the first row, while its column has a 9
+UNSOLVABLE = "123456780000000009" + "0" * 63
+
+
+def counts(puzzle, limit):
+    dlx, fc = DLXGame(Sudoku(puzzle=puzzle), -1, True), Game(Sudoku(puzzle=puzzle), -1, True)
+    return dlx.count_solutions(limit), fc.count_solutions(limit), dlx, fc
+
+
+def test_exact_cover():
+    # Knuth's example: the only cover is rows 0, 3 and 4
+    links = DancingLinks(7)
+    for row_id, columns in enumerate([(3, 5, 6), (1, 4, 7), (2, 3, 6), (1, 4), (2, 7), (4, 5, 7)]):
+        links.add_row(row_id, columns)
+    assert [sorted(solution) for solution in links.solve(10)] == [[0, 3, 4]]
+
+
+@pytest.mark.parametrize("puzzle", FILES + [UNIQUE])
+def test_counts_match_forward_checking(puzzle):
+    dlx_count, fc_count, dlx, fc = counts(puzzle, 10)
+    assert dlx_count == fc_count
+    assert sorted(dlx.solutions) == sorted(fc.solutions)
+
+
+def test_counts_zero_one_and_many():
+    assert counts(UNIQUE, 10)[:2] == (1, 1)
+    assert counts(MANY, 50)[:2] == (50, 50)
+    assert counts(UNSOLVABLE, 10)[:2] == (0, 0)
+    assert not DLXGame(Sudoku(puzzle=UNSOLVABLE), -1, True).full_solver()
+
+
+def test_clashing_givens():
+    puzzle = "55" + UNIQUE[2:]
+    assert not DLXGame(Sudoku(puzzle=puzzle), -1, True).full_solver()
+    assert counts(puzzle, 2)[:2] == (0, 0)
+
+
+def test_16x16_board():
+    empty = DLXGame(Sudoku(puzzle=" ".join(["0"] * 256)), -1, True)
+    assert empty.full_solver() and empty.valid_solution()
+    solution = [field.get_value() for field in empty.cells]
+    rng = random.Random(16)
+    for cell in rng.sample(range(256), 100):
+        solution[cell] = 0
+    puzzle = " ".join(map(str, solution))
+    game = DLXGame(Sudoku(puzzle=puzzle), -1, True)
+    assert game.full_solver() and game.valid_solution()
+    assert all(given in (0, field.get_value()) for given, field in zip(solution, game.cells))
+    assert DLXGame(Sudoku(puzzle=puzzle), -1, True).count_solutions(2) == \
+        Game(Sudoku(puzzle=puzzle), -1, True).count_solutions(2)
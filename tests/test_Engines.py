@@ -0,0 +1,15 @@
+from DLX import DLXGame
+from Engines import default_engine, make_game
+from Game import Game
+from Sudoku import Sudoku
+
+
+def test_default_engine_by_box_size():
+    assert [default_engine(box_size) for box_size in (2, 3, 4, 5)] == ["fc", "fc", "fc", "dlx"]
+    assert isinstance(make_game(None, Sudoku(puzzle="0" * 81), -1, True), Game)
+
+
+def test_empty_25x25_board_is_solved_with_dlx():
+    game = make_game(None, Sudoku(puzzle=" ".join(["0"] * 625)), -1, True)
+    assert isinstance(game, DLXGame)
+    assert game.full_solver() and game.valid_solution()
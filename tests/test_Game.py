@@ -0,0 +1,53 @@
+import os
+
+from Game import Game, INIT_ALL_ARCS, INIT_GIVENS
+from Instrumentation import Instrumentation
+from Sudoku import Sudoku
+
+SUDOKUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Sudokus")
+SOLUTION = "534678912672195348198342567859761423426853791713924856961537284287419635345286179"
+# every field left unset has all but one value among its givens
+DECIDED_BY_GIVENS = "534070912672195348190342067859701423026853791713924856961537204207419635345286170"
+# the givens decide every field, but give two fields of the first row the same value
+CLASHING_SINGLES = "034678912672195348190042560859761423426853001713904856961537284287419635305286190"
+
+
+def givens_game(puzzle, instrumentation=None):
+    return Game(Sudoku(puzzle=puzzle), -1, True, instrumentation=instrumentation, init_mode=INIT_GIVENS)
+
+
+def test_board_solved_by_givens_is_reported():
+    instrumentation = Instrumentation()
+    reported = []
+    instrumentation.subscribe("solved_by_givens", reported.append)
+    game = givens_game(DECIDED_BY_GIVENS, instrumentation)
+    assert game.AC_3()
+    assert game.solved_by_givens
+    assert reported == [game]
+    assert game.sudoku.to_string() == SOLUTION
+    assert game.valid_solution()
+
+
+def test_board_needing_search_is_not_reported():
+    game = givens_game(Sudoku(os.path.join(SUDOKUS, "Sudoku1.txt")).to_string())
+    assert game.AC_3()
+    assert not game.solved_by_givens
+    assert not Game(Sudoku(puzzle=DECIDED_BY_GIVENS), -1, True, init_mode=INIT_ALL_ARCS).solved_by_givens
+
+
+def test_clashing_singles_are_not_reported():
+    game = givens_game(CLASHING_SINGLES)
+    assert not game.AC_3()
+    assert not game.solved_by_givens
+
+
+def test_givens_start_reaches_the_same_domains():
+    for name in sorted(os.listdir(SUDOKUS)):
+        puzzle = Sudoku(os.path.join(SUDOKUS, name)).to_string()
+        boards = []
+        for init_mode in (INIT_ALL_ARCS, INIT_GIVENS):
+            game = Game(Sudoku(puzzle=puzzle), -1, True, init_mode=init_mode)
+            assert game.AC_3()
+            boards.append([field.get_domain_mask() if field.get_value() == 0 else -field.get_value()
+                           for field in game.cells])
+        assert boards[0] == boards[1]
@@ -0,0 +1,74 @@
+import multiprocessing
+import threading
+import time
+
+import ParallelSearch
+from Game import Game
+from ParallelSearch import parallel_count, parallel_solve, split, _search_subproblem
+from Sudoku import Sudoku
+
+UNIQUE = "000000010400000000020000000000050407008000300001090000300400200050100000000806000"
+# 234 solutions
+MANY = "004000910000090340108000000000001020006003700000004050900537004000000600040006000"
+UNSOLVABLE = "123456780000000009" + "0" * 63
+
+
+def serial_solutions(puzzle, limit=10000):
+    game = Game(Sudoku(puzzle=puzzle), -1, True)
+    game.count_solutions(limit)
+    return game.solutions
+
+
+def test_split_covers_the_search_space_without_overlap():
+    sudoku = Sudoku(puzzle=MANY)
+    subproblems = split(sudoku, 20)
+    assert len(subproblems) >= 20
+    assert sudoku.to_string() == MANY
+    solutions = []
+    for snapshot in subproblems:
+        solutions += serial_solutions(Sudoku(snapshot=snapshot).to_string())
+    assert len(solutions) == len(set(solutions))
+    assert sorted(solutions) == sorted(serial_solutions(MANY))
+
+
+def test_parallel_count_matches_the_serial_count():
+    result = parallel_count(MANY, limit=10000, max_workers=2, tasks_per_worker=4)
+    assert result.count == 234
+    assert sorted(result.solutions) == sorted(serial_solutions(MANY))
+    assert parallel_count(MANY, limit=10, max_workers=2).count == 10
+
+
+def test_solve():
+    result = parallel_solve(UNIQUE, max_workers=2)
+    assert result.solution == serial_solutions(UNIQUE)[0]
+
+
+def test_unsolvable_board_has_no_solution():
+    result = parallel_solve(UNSOLVABLE, max_workers=2)
+    assert result.solution is None
+    assert result.count == 0
+
+
+def test_cancelled_worker_stops():
+    ParallelSearch._cancel = multiprocessing.Event()
+    try:
+        snapshot = Sudoku(puzzle="0" * 81).snapshot()
+        # an empty board has more solutions than could ever be found, only the event stops the search
+        timer = threading.Timer(0.3, ParallelSearch._cancel.set)
+        timer.start()
+        start = time.perf_counter()
+        solutions, nodes = _search_subproblem(snapshot, 3, 10 ** 9, -1, 100)
+        assert time.perf_counter() - start < 5
+        assert solutions and nodes
+        # set before the worker starts, nothing is searched
+        assert _search_subproblem(snapshot, 3, 10 ** 9, -1, 100) == ([], 0)
+    finally:
+        ParallelSearch._cancel = None
+
+
+def test_first_solution_ends_every_worker():
+    # on an empty board every subproblem is solvable, the first solution found cancels the others
+    result = parallel_solve("0" * 81, max_workers=2, tasks_per_worker=8)
+    assert result.count == 1
+    assert Game(Sudoku(puzzle=result.solution), -1, True).valid_solution()
+    assert not multiprocessing.active_children()
@@ -0,0 +1,143 @@
+import os
+
+from Domain import FULL_DOMAIN, value_to_bit
+from Game import Game
+from Propagation import (CHANGED, CONTRADICTION, NO_CHANGE, HiddenSingles, HiddenSubsets, NakedSubsets,
+                         PointingClaiming, propagate, rules_for_level)
+from Sudoku import Sudoku
+
+SUDOKUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Sudokus")
+ROW = list(range(9))  # first row of the board
+BOX_BELOW_ROW = [9, 10, 11, 18, 19, 20]  # the fields of the first block outside the first row
+
+
+def mask(*values):
+    bits = 0
+    for value in values:
+        bits |= value_to_bit(value)
+    return bits
+
+
+def empty_game():
+    return Game(Sudoku(puzzle="0" * 81), -1, True)
+
+
+def remove(game, cells, *values):
+    for cell in cells:
+        field = game.cells[cell]
+        field.set_domain_mask(field.get_domain_mask() & ~mask(*values))
+
+
+def domain(game, cell):
+    return game.cells[cell].get_domain_mask()
+
+
+def test_hidden_single_is_placed():
+    game = empty_game()
+    remove(game, ROW[1:], 5)
+    rule = HiddenSingles()
+    assert rule.apply(game) == CHANGED
+    assert game.cells[0].get_value() == 5
+    assert game.rule_firings == {"hidden_singles": 1}
+    assert rule.apply(game) == NO_CHANGE
+    assert game.rule_firings == {"hidden_singles": 1}
+
+
+def test_value_with_nowhere_to_go_is_a_contradiction():
+    game = empty_game()
+    remove(game, ROW, 5)
+    assert HiddenSingles().apply(game) == CONTRADICTION
+
+
+def test_pair_of_values_for_one_field_is_a_contradiction():
+    game = empty_game()
+    remove(game, ROW[1:], 1, 2)
+    assert HiddenSubsets(2).apply(game) == CONTRADICTION
+
+
+def test_naked_pair_is_removed_from_the_rest_of_the_unit():
+    game = empty_game()
+    for cell in (0, 4):
+        game.cells[cell].set_domain_mask(mask(1, 2))
+    rule = NakedSubsets(2)
+    assert rule.apply(game) == CHANGED
+    for cell in ROW:
+        assert domain(game, cell) == (mask(1, 2) if cell in (0, 4) else FULL_DOMAIN & ~mask(1, 2))
+    assert domain(game, 9) == FULL_DOMAIN  # same block as the pair, but the pair doesn't lie within the block
+    assert game.rule_firings == {"naked_subsets_2": 1}
+
+
+def test_naked_triple_is_removed_from_the_rest_of_the_unit():
+    game = empty_game()
+    for cell, values in ((0, (1, 2)), (4, (2, 3)), (8, (1, 3))):
+        game.cells[cell].set_domain_mask(mask(*values))
+    assert NakedSubsets(2).apply(game) == NO_CHANGE
+    assert NakedSubsets(3).apply(game) == CHANGED
+    for cell in (1, 2, 3, 5, 6, 7):
+        assert domain(game, cell) == FULL_DOMAIN & ~mask(1, 2, 3)
+    assert game.rule_firings == {"naked_subsets_3": 1}
+
+
+def test_hidden_pair_loses_its_other_values():
+    game = empty_game()
+    remove(game, [cell for cell in ROW if cell not in (0, 4)], 1, 2)
+    rule = HiddenSubsets(2)
+    assert rule.apply(game) == CHANGED
+    assert domain(game, 0) == domain(game, 4) == mask(1, 2)
+    assert domain(game, 1) == FULL_DOMAIN & ~mask(1, 2)
+    assert game.rule_firings == {"hidden_subsets_2": 1}
+
+
+def test_hidden_triple_loses_its_other_values():
+    game = empty_game()
+    remove(game, [cell for cell in ROW if cell not in (0, 4, 8)], 1, 2, 3)
+    assert HiddenSubsets(2).apply(game) == NO_CHANGE
+    assert HiddenSubsets(3).apply(game) == CHANGED
+    assert domain(game, 0) == domain(game, 4) == domain(game, 8) == mask(1, 2, 3)
+    assert game.rule_firings == {"hidden_subsets_3": 1}
+
+
+def test_pointing_removes_the_value_from_the_rest_of_the_row():
+    game = empty_game()
+    remove(game, BOX_BELOW_ROW, 1)  # within the first block, 1 only fits in the first row
+    assert PointingClaiming().apply(game) == CHANGED
+    for cell in ROW:
+        assert domain(game, cell) == (FULL_DOMAIN if cell < 3 else FULL_DOMAIN & ~mask(1))
+    assert domain(game, 12) == FULL_DOMAIN
+    assert game.rule_firings == {"pointing_claiming": 1}
+
+
+def test_claiming_removes_the_value_from_the_rest_of_the_block():
+    game = empty_game()
+    remove(game, ROW[3:], 1)  # within the first row, 1 only fits in the first block
+    assert PointingClaiming().apply(game) == CHANGED
+    for cell in BOX_BELOW_ROW:
+        assert domain(game, cell) == FULL_DOMAIN & ~mask(1)
+    assert domain(game, 0) == FULL_DOMAIN
+    assert domain(game, 12) == FULL_DOMAIN
+    assert game.rule_firings == {"pointing_claiming": 1}
+
+
+def test_rules_for_level():
+    assert [rule.name for rule in rules_for_level(0)] == []
+    assert [rule.name for rule in rules_for_level(1)] == ["hidden_singles"]
+    assert [rule.name for rule in rules_for_level(3)] == ["hidden_singles", "naked_subsets_2", "hidden_subsets_2",
+                                                          "pointing_claiming", "naked_subsets_3", "hidden_subsets_3"]
+
+
+def test_propagation_keeps_the_solution():
+    # AC-3 alone gets stuck on this one, pointing and claiming take it further
+    puzzle = Sudoku(os.path.join(SUDOKUS, "Sudoku4.txt")).to_string()
+    solved = Game(Sudoku(puzzle=puzzle), -1, True)
+    assert solved.backtracker() and solved.valid_solution()
+    solution = solved.sudoku.to_string()
+
+    game = Game(Sudoku(puzzle=puzzle), -1, True)
+    assert propagate(game, rules_for_level(3))
+    assert game.rule_firings.get("pointing_claiming", 0) > 0
+    assert set(game.rule_firings) <= {rule.name for rule in rules_for_level(3)}
+    for field, value in zip(game.cells, solution):
+        if field.get_value() != 0:
+            assert field.get_value() == int(value)
+        else:
+            assert field.get_domain_mask() & value_to_bit(int(value))
@@ -0,0 +1,66 @@
+import pytest
+
+from Game import Game
+from Search import Search, SOLVED, EXHAUSTED, PAUSED
+from Sudoku import Sudoku
+
+PUZZLE = "000000010400000000020000000000050407008000300001090000300400200050100000000806000"
+# 234 solutions
+MANY = "004000910000090340108000000000001020006003700000004050900537004000000600040006000"
+# consistent givens that AC-3 can't refute, only the search finds there is no solution
+UNSOLVABLE = "534608010000090040000000007059060820400800001003024050960500004000010605345000000"
+
+
+def search_of(puzzle):
+    game = Game(Sudoku(puzzle=puzzle), -1, True)
+    assert game.AC_3()
+    game.search = Search(game)
+    return game, game.search
+
+
+def test_paused_search_resumes_to_the_same_result():
+    game, search = search_of(PUZZLE)
+    assert search.run() == SOLVED
+    solution, nodes = game.sudoku.to_string(), search.nodes
+
+    game, search = search_of(PUZZLE)
+    statuses = []
+    while not statuses or statuses[-1] == PAUSED:
+        statuses.append(search.run(max_nodes=97))
+    assert statuses[-1] == SOLVED
+    assert len(statuses) == -(-nodes // 97)
+    assert game.sudoku.to_string() == solution
+    assert search.nodes == nodes
+    assert game.valid_solution()
+
+
+def test_steps_and_timeout():
+    game, search = search_of(PUZZLE)
+    statuses = list(search.steps(every=500))
+    assert statuses[-1] == SOLVED
+    assert set(statuses[:-1]) <= {PAUSED}
+    game, search = search_of(PUZZLE)
+    assert search.run(timeout=0) == PAUSED
+    assert search.run() == SOLVED
+
+
+@pytest.mark.parametrize("puzzle, count", [(PUZZLE, 1), (MANY, 234)])
+def test_search_continues_after_each_solution(puzzle, count):
+    game, search = search_of(puzzle)
+    solutions = set()
+    while search.run(max_nodes=50) != EXHAUSTED:
+        if search.status == SOLVED:
+            assert game.valid_solution()
+            solutions.add(game.sudoku.to_string())
+    assert len(solutions) == count
+
+
+def test_exhausted_and_unwound():
+    game, search = search_of(UNSOLVABLE)
+    assert search.run() == EXHAUSTED
+    game, search = search_of(MANY)
+    before = [(field.get_value(), field.get_domain_mask()) for field in game.cells]
+    assert search.run(max_nodes=30) == PAUSED
+    search.unwind()
+    assert search.status == EXHAUSTED
+    assert [(field.get_value(), field.get_domain_mask()) for field in game.cells] == before
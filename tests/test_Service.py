@@ -0,0 +1,99 @@
+import asyncio
+import json
+import os
+import time
+import pytest
+
+from Service import SolverService, parse_request, solve_request
+from Sudoku import Sudoku
+
+SUDOKUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Sudokus")
+PUZZLE = Sudoku(os.path.join(SUDOKUS, "Sudoku1.txt")).to_string()
+
+
+@pytest.mark.parametrize("line", [
+    '{"puzzle": null}',
+    '{"puzzle": ["0"]}',
+    '{"puzzle": "%s", "timeout": null, "level": null}' % PUZZLE,
+    '{"puzzle": "%s", "level": [1]}' % PUZZLE,
+    '{"puzzle": "%s", "level": {"a": 1}}' % PUZZLE,
+    '{"puzzle": "%s", "level": true}' % PUZZLE,
+    '{"puzzle": "%s", "level": 1.5}' % PUZZLE,
+    '{"puzzle": "%s", "timeout": [1]}' % PUZZLE,
+    '{"puzzle": "%s", "timeout": {}}' % PUZZLE,
+    '{"puzzle": "%s", "timeout": "1"}' % PUZZLE,
+    '{"puzzle": "%s", "timeout": NaN}' % PUZZLE,
+])
+def test_malformed_requests_raise_value_error(line):
+    with pytest.raises(ValueError):
+        parse_request(line, 0)
+
+
+def test_request_fields():
+    request = parse_request('{"id": "a", "puzzle": "%s", "timeout": 2, "level": 3}' % PUZZLE, 5)
+    assert request == {"id": "a", "puzzle": PUZZLE, "timeout": 2.0, "level": 3}
+    assert parse_request(PUZZLE, 5) == {"id": 5, "puzzle": PUZZLE, "timeout": None, "level": 0}
+
+
+def test_deadline_passed_before_propagation():
+    result = solve_request(PUZZLE, deadline=time.time() - 1)
+    assert result["status"] == "timeout"
+    assert result["solution"] is None
+    assert solve_request(PUZZLE)["status"] == "solved"
+
+
+def test_bad_request_pipelined_with_good_ones(tmp_path):
+    path = str(tmp_path / "service.sock")
+    lines = ['{"id": "good1", "puzzle": "%s"}' % PUZZLE,
+             '{"id": "bad", "puzzle": "%s", "timeout": null, "level": [1]}' % PUZZLE,
+             '{"id": "bad2", "puzzle": "%s", "timeout": {"s": 1}}' % PUZZLE,
+             '{not json',
+             '\udcff',
+             '{"id": "good2", "puzzle": "%s", "level": 1}' % PUZZLE]
+
+    async def run():
+        service = SolverService(max_workers=1, max_in_flight=2)
+        await service.start(path=path)
+        try:
+            reader, writer = await asyncio.open_unix_connection(path)
+            writer.write("".join(line + "\n" for line in lines).encode(errors="surrogateescape"))
+            await writer.drain()
+            writer.write_eof()
+            responses = []
+            while line := await asyncio.wait_for(reader.readline(), 30):
+                responses.append(json.loads(line))
+            writer.close()
+            return responses
+        finally:
+            await service.close()
+
+    responses = asyncio.run(run())
+    assert len(responses) == len(lines)
+    by_id = {response["id"]: response for response in responses}
+    assert by_id["good1"]["status"] == by_id["good2"]["status"] == "solved"
+    assert sum(response["status"] == "error" for response in responses) == 4
+
+
+def test_idle_connections_hold_no_slot(tmp_path):
+    path = str(tmp_path / "service.sock")
+
+    async def run():
+        service = SolverService(max_workers=1, max_in_flight=2)
+        await service.start(path=path)
+        try:
+            # as many idle connections as there are slots, none of them sends anything
+            idle = [await asyncio.open_unix_connection(path) for _ in range(service.max_in_flight)]
+            await asyncio.sleep(0.1)
+            reader, writer = await asyncio.open_unix_connection(path)
+            writer.write((PUZZLE + "\n").encode())
+            await writer.drain()
+            response = json.loads(await asyncio.wait_for(reader.readline(), 10))
+            for _, idle_writer in idle + [(reader, writer)]:
+                idle_writer.close()
+            return response
+        finally:
+            await service.close()
+
+    response = asyncio.run(run())
+    assert response["id"] == 0
+    assert response["status"] == "solved"
@@ -0,0 +1,69 @@
+from Game import Game
+from Sudoku import Sudoku
+from Trail import Trail
+
+PUZZLE = "000000010400000000020000000000050407008000300001090000300400200050100000000806000"
+
+
+def domains(game):
+    return [(field.get_value(), field.get_domain_mask()) for field in game.cells]
+
+
+def propagated_game():
+    game = Game(Sudoku(puzzle=PUZZLE), -1, True)
+    assert game.AC_3()
+    return game
+
+
+def test_undo_restores_nested_levels():
+    game = propagated_game()
+    trail = Trail(game.cells, game.topology.arc_count)
+    before = domains(game)
+    outer = trail.mark()
+    for cell in (0, 1, 2):
+        trail.save(cell, game.cells[cell].get_domain_mask())
+        game.cells[cell].set_domain_mask(0)
+    middle = domains(game)
+    inner = trail.mark()
+    # saved twice in one level, the oldest mask wins on undo
+    for mask in (1, 2):
+        trail.save(0, game.cells[0].get_domain_mask())
+        game.cells[0].set_domain_mask(mask)
+    trail.undo(inner)
+    assert domains(game) == middle
+    assert trail.top == inner
+    trail.undo(outer)
+    assert domains(game) == before
+    assert trail.top == 0
+
+
+def test_forward_check_undo_restores_every_domain_exactly():
+    game = propagated_game()
+    before = domains(game)
+    mark = game.trail.mark()
+    for field in [f for f in game.cells if f.get_value() == 0][:3]:
+        value = field.get_domain()[0]
+        field.set_value(value)
+        if not game.forward_check(field, value):
+            # a failed check undoes itself and unsets the field
+            assert field.get_value() == 0
+    game.undo_changes(mark)
+    for field in game.cells:
+        if before[field.get_index()][0] == 0:
+            field.remove_value()
+    assert domains(game) == before
+
+
+def test_failed_forward_check_undoes_itself():
+    game = propagated_game()
+    field = next(f for f in game.cells if f.get_value() == 0)
+    peer = next(game.cells[p] for p in game.topology.peers[field.get_index()] if game.cells[p].get_value() == 0)
+    value = peer.get_domain()[0]
+    # the peer is left with the value the field takes: a wipeout
+    peer.set_domain_mask(1 << (value - 1))
+    before = domains(game)
+    field.set_value(value)
+    assert not game.forward_check(field, value)
+    assert domains(game) == before
+    assert game.trail.top == 0
+    assert game.wipeouts == 1